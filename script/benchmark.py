@@ -0,0 +1,456 @@
+"""
+飞马接口热点路径性能测试，无需网络和底层接口库即可运行。
+
+运行前会将底层MdApi/TdApi替换为纯Python替身（vnpy_femas/api/femas_stub.py），
+测试结果以JSON格式输出，便于在不同版本之间比较。
+
+    python benchmark.py --number 100000 --output result.json
+"""
+
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from collections.abc import Callable
+from datetime import datetime
+from importlib.util import find_spec, module_from_spec, spec_from_file_location
+from pathlib import Path
+from threading import Event as ThreadEvent
+from time import perf_counter_ns
+from types import ModuleType
+
+
+def install_stub() -> None:
+    """在导入vnpy_femas之前，将底层接口模块替换为纯Python替身"""
+    spec = find_spec("vnpy_femas")
+    if not spec or not spec.submodule_search_locations:
+        raise ImportError("找不到vnpy_femas")
+
+    package_path: Path = Path(list(spec.submodule_search_locations)[0])
+    stub_spec = spec_from_file_location("vnpy_femas.api.femas_stub", package_path / "api" / "femas_stub.py")
+    if not stub_spec or not stub_spec.loader:
+        raise ImportError("找不到femas_stub")
+
+    stub: ModuleType = module_from_spec(stub_spec)
+    stub_spec.loader.exec_module(stub)
+
+    for name, cls in [("vnfemasmd", stub.MdApi), ("vnfemastd", stub.TdApi)]:
+        module: ModuleType = ModuleType(f"vnpy_femas.api.{name}")
+        setattr(module, cls.__name__, cls)
+        sys.modules[module.__name__] = module
+
+
+install_stub()
+
+
+from vnpy.event import Event, EventEngine                       # noqa: E402
+from vnpy.trader.constant import Direction, Exchange, Offset, OrderType, Product    # noqa: E402
+from vnpy.trader.event import EVENT_TICK                         # noqa: E402
+from vnpy.trader.object import CancelRequest, ContractData, OrderRequest, TickData   # noqa: E402
+
+import vnpy_femas                                                # noqa: E402
+from vnpy_femas.api import (                                     # noqa: E402
+    USTP_FTDC_D_Buy,
+    USTP_FTDC_OF_Open,
+    USTP_FTDC_OS_NoTradeQueueing,
+    USTP_FTDC_OT_CallOptions,
+)
+from vnpy_femas.gateway import femas_gateway                     # noqa: E402
+from vnpy_femas.gateway.femas_gateway import FemasGateway        # noqa: E402
+
+
+SYMBOL: str = "rb2501"
+GATEWAY_NAME: str = "FEMAS"
+
+
+def create_gateway() -> FemasGateway:
+    """创建连接替身接口的FemasGateway，已完成登录和合约加载"""
+    femas_gateway.symbol_contract_map[SYMBOL] = ContractData(
+        symbol=SYMBOL,
+        exchange=Exchange.SHFE,
+        name="螺纹钢2501",
+        product=Product.FUTURES,
+        size=10,
+        pricetick=1,
+        gateway_name=GATEWAY_NAME,
+    )
+
+    gateway: FemasGateway = FemasGateway(EventEngine(), GATEWAY_NAME)
+    gateway.td_api.investorid = "000001"
+    gateway.td_api.templates_ready = True
+    gateway.td_api.login_status = True
+    gateway.md_api.login_status = True
+    return gateway
+
+
+def generate_tick(i: int) -> dict:
+    """生成深度行情推送数据"""
+    seconds: int = i // 2
+    return {
+        "TradingDay": "20240102",
+        "ActionDay": "20240102",
+        "InstrumentID": SYMBOL,
+        "UpdateTime": f"{9 + seconds // 3600 % 6:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}",
+        "UpdateMillisec": 500 if i % 2 else 0,
+        "Volume": i,
+        "Turnover": i * 30000.0,
+        "OpenInterest": 100000.0,
+        "LastPrice": 3000.0 + i % 10,
+        "UpperLimitPrice": 3300.0,
+        "LowerLimitPrice": 2700.0,
+        "OpenPrice": 3000.0,
+        "HighestPrice": 3010.0,
+        "LowestPrice": 2990.0,
+        "PreClosePrice": 3000.0,
+        "BidPrice1": 2999.0,
+        "AskPrice1": 3001.0,
+        "BidVolume1": 10,
+        "AskVolume1": 12,
+    }
+
+
+def generate_order(i: int) -> dict:
+    """生成委托推送数据"""
+    return {
+        "InsertDate": "20240102",
+        "InsertTime": f"09:{i // 60 % 60:02d}:{i % 60:02d}",
+        "InstrumentID": SYMBOL,
+        "ExchangeID": "SHFE",
+        "UserOrderLocalID": str(i).rjust(12, "0"),
+        "Direction": USTP_FTDC_D_Buy,
+        "OffsetFlag": USTP_FTDC_OF_Open,
+        "LimitPrice": 3000.0,
+        "Volume": 1,
+        "VolumeTraded": 0,
+        "OrderStatus": USTP_FTDC_OS_NoTradeQueueing,
+    }
+
+
+def generate_trade(i: int) -> dict:
+    """生成成交推送数据"""
+    return {
+        "TradeID": str(i),
+        "TradingDay": "20240102",
+        "TradeDate": "20240102",
+        "TradeTime": f"09:{i // 60 % 60:02d}:{i % 60:02d}",
+        "InstrumentID": SYMBOL,
+        "ExchangeID": "SHFE",
+        "UserOrderLocalID": str(i).rjust(12, "0"),
+        "Direction": USTP_FTDC_D_Buy,
+        "OffsetFlag": USTP_FTDC_OF_Open,
+        "TradePrice": 3000.0,
+        "TradeVolume": 1,
+    }
+
+
+def generate_instrument(i: int) -> dict:
+    """生成合约查询回报数据，每两个合约中有一个期权"""
+    option: bool = bool(i % 2)
+    return {
+        "InstrumentID": f"ag{i}",
+        "ExchangeID": "SHFE",
+        "InstrumentName": f"合约{i}",
+        "VolumeMultiple": 15,
+        "PriceTick": 1.0,
+        "OptionsType": USTP_FTDC_OT_CallOptions if option else "",
+        "InstrumentID_2": "",
+        "ProductID": "ag",
+        "UnderlyingInstrID": "ag2501",
+        "StrikePrice": 5000.0 + i,
+        "ExpireDate": "20241225",
+    }
+
+
+def generate_position(i: int) -> dict:
+    """生成持仓查询回报数据"""
+    return {
+        "InstrumentID": SYMBOL,
+        "Direction": USTP_FTDC_D_Buy,
+        "YdPosition": 1,
+        "Position": 2,
+        "PositionCost": 60000.0,
+        "FrozenPosition": 0,
+    }
+
+
+def measure(name: str, number: int, func: Callable[[int], object]) -> dict:
+    """逐次调用并统计吞吐量和单次延时"""
+    costs: list[int] = []
+
+    total_start: int = perf_counter_ns()
+    for i in range(number):
+        start: int = perf_counter_ns()
+        func(i)
+        costs.append(perf_counter_ns() - start)
+    total: int = perf_counter_ns() - total_start
+
+    return summarize(name, total, costs)
+
+
+def summarize(name: str, total: int, costs: list[int]) -> dict:
+    """汇总测试结果"""
+    costs.sort()
+    number: int = len(costs)
+
+    return {
+        "name": name,
+        "number": number,
+        "total_s": total / 1e9,
+        "throughput": number / (total / 1e9),
+        "mean_ns": sum(costs) / number,
+        "p50_ns": costs[number // 2],
+        "p99_ns": costs[min(number - 1, int(number * 0.99))],
+        "max_ns": costs[-1],
+    }
+
+
+def bench_tick(number: int) -> dict:
+    """行情推送"""
+    gateway: FemasGateway = create_gateway()
+    ticks: list[dict] = [generate_tick(i) for i in range(number)]
+    func: Callable = gateway.md_api.onRtnDepthMarketData
+    return measure("md.onRtnDepthMarketData", number, lambda i: func(ticks[i]))
+
+
+def bench_order(number: int) -> dict:
+    """委托推送"""
+    gateway: FemasGateway = create_gateway()
+    orders: list[dict] = [generate_order(i) for i in range(number)]
+    func: Callable = gateway.td_api.onRtnOrder
+    return measure("td.onRtnOrder", number, lambda i: func(orders[i]))
+
+
+def bench_trade(number: int) -> dict:
+    """成交推送"""
+    gateway: FemasGateway = create_gateway()
+    trades: list[dict] = [generate_trade(i) for i in range(number)]
+    func: Callable = gateway.td_api.onRtnTrade
+    return measure("td.onRtnTrade", number, lambda i: func(trades[i]))
+
+
+def bench_instrument(number: int) -> dict:
+    """合约查询回报"""
+    gateway: FemasGateway = create_gateway()
+    instruments: list[dict] = [generate_instrument(i) for i in range(number)]
+    func: Callable = gateway.td_api.onRspQryInstrument
+    error: dict = {"ErrorID": 0, "ErrorMsg": ""}
+    last: int = number - 1
+    return measure("td.onRspQryInstrument", number, lambda i: func(instruments[i], error, 1, i == last))
+
+
+def bench_position(number: int) -> dict:
+    """持仓查询回报"""
+    gateway: FemasGateway = create_gateway()
+    position: dict = generate_position(0)
+    func: Callable = gateway.td_api.onRspQryInvestorPosition
+    error: dict = {"ErrorID": 0, "ErrorMsg": ""}
+    return measure("td.onRspQryInvestorPosition", number, lambda i: func(position, error, 1, bool(i % 10 == 9)))
+
+
+def generate_order_request() -> OrderRequest:
+    """生成委托请求"""
+    return OrderRequest(
+        symbol=SYMBOL,
+        exchange=Exchange.SHFE,
+        direction=Direction.LONG,
+        type=OrderType.LIMIT,
+        volume=1,
+        price=3000,
+        offset=Offset.OPEN,
+    )
+
+
+def bench_send_order(number: int) -> dict:
+    """委托下单（委托模板）"""
+    gateway: FemasGateway = create_gateway()
+    req: OrderRequest = generate_order_request()
+    func: Callable = gateway.td_api.send_order
+    return measure("td.send_order", number, lambda i: func(req))
+
+
+def bench_send_order_dict(number: int) -> dict:
+    """委托下单（字典请求）"""
+    gateway: FemasGateway = create_gateway()
+    gateway.td_api.template_mode = False
+    req: OrderRequest = generate_order_request()
+    func: Callable = gateway.td_api.send_order
+    return measure("td.send_order_dict", number, lambda i: func(req))
+
+
+def bench_cancel_order(number: int) -> dict:
+    """委托撤单"""
+    gateway: FemasGateway = create_gateway()
+    reqs: list[CancelRequest] = [
+        CancelRequest(orderid=str(i).rjust(12, "0"), symbol=SYMBOL, exchange=Exchange.SHFE)
+        for i in range(number)
+    ]
+    func: Callable = gateway.td_api.cancel_order
+    return measure("td.cancel_order", number, lambda i: func(reqs[i]))
+
+
+def bench_tick_to_handler(number: int) -> dict:
+    """行情从底层回调经过EventEngine到达处理函数的端到端延时，逐笔推送并等待处理完成"""
+    gateway: FemasGateway = create_gateway()
+    event_engine: EventEngine = gateway.event_engine
+    ticks: list[dict] = [generate_tick(i) for i in range(number)]
+
+    handled: ThreadEvent = ThreadEvent()
+    end: list[int] = [0]
+
+    def process_tick_event(event: Event) -> None:
+        end[0] = perf_counter_ns()
+        handled.set()
+
+    event_engine.register(EVENT_TICK, process_tick_event)
+    event_engine.start()
+
+    func: Callable = gateway.md_api.onRtnDepthMarketData
+    costs: list[int] = []
+
+    total_start: int = perf_counter_ns()
+    for tick in ticks:
+        handled.clear()
+        start: int = perf_counter_ns()
+        func(tick)
+        handled.wait()
+        costs.append(end[0] - start)
+    total: int = perf_counter_ns() - total_start
+
+    event_engine.stop()
+
+    return summarize("e2e.tick_to_handler", total, costs)
+
+
+def bench_tick_to_callback(number: int) -> dict:
+    """行情从底层回调直接到达直连行情回调的延时，不经过EventEngine"""
+    gateway: FemasGateway = create_gateway()
+    ticks: list[dict] = [generate_tick(i) for i in range(number)]
+
+    end: list[int] = [0]
+
+    def on_tick(tick: TickData) -> None:
+        end[0] = perf_counter_ns()
+
+    gateway.register_tick_callback(SYMBOL, on_tick, publish=False)
+
+    func: Callable = gateway.md_api.onRtnDepthMarketData
+    costs: list[int] = []
+
+    total_start: int = perf_counter_ns()
+    for tick in ticks:
+        start: int = perf_counter_ns()
+        func(tick)
+        costs.append(end[0] - start)
+    total: int = perf_counter_ns() - total_start
+
+    return summarize("e2e.tick_to_callback", total, costs)
+
+
+def run_tick_to_order(number: int, template_mode: bool) -> dict:
+    """行情从底层回调经过EventEngine触发策略下单，到调用底层委托函数的端到端延时"""
+    gateway: FemasGateway = create_gateway()
+    gateway.td_api.template_mode = template_mode
+    event_engine: EventEngine = gateway.event_engine
+    ticks: list[dict] = [generate_tick(i) for i in range(number)]
+    req: OrderRequest = generate_order_request()
+
+    sent: ThreadEvent = ThreadEvent()
+    end: list[int] = [0]
+
+    def request(*args: object) -> int:
+        end[0] = perf_counter_ns()
+        sent.set()
+        return 0
+
+    if template_mode:
+        gateway.td_api.reqOrderInsertTemplate = request
+        name: str = "e2e.tick_to_order"
+    else:
+        gateway.td_api.reqOrderInsert = request
+        name = "e2e.tick_to_order_dict"
+
+    def process_tick_event(event: Event) -> None:
+        gateway.send_order(req)
+
+    event_engine.register(EVENT_TICK, process_tick_event)
+    event_engine.start()
+
+    func: Callable = gateway.md_api.onRtnDepthMarketData
+    costs: list[int] = []
+
+    total_start: int = perf_counter_ns()
+    for tick in ticks:
+        sent.clear()
+        start: int = perf_counter_ns()
+        func(tick)
+        sent.wait()
+        costs.append(end[0] - start)
+    total: int = perf_counter_ns() - total_start
+
+    event_engine.stop()
+
+    return summarize(name, total, costs)
+
+
+def bench_tick_to_order(number: int) -> dict:
+    """行情到委托（委托模板）"""
+    return run_tick_to_order(number, True)
+
+
+def bench_tick_to_order_dict(number: int) -> dict:
+    """行情到委托（字典请求）"""
+    return run_tick_to_order(number, False)
+
+
+BENCHMARKS: list[Callable[[int], dict]] = [
+    bench_tick,
+    bench_order,
+    bench_trade,
+    bench_instrument,
+    bench_position,
+    bench_send_order,
+    bench_send_order_dict,
+    bench_cancel_order,
+    bench_tick_to_handler,
+    bench_tick_to_callback,
+    bench_tick_to_order,
+    bench_tick_to_order_dict,
+]
+
+
+def main() -> None:
+    """主入口函数"""
+    parser: ArgumentParser = ArgumentParser(description="飞马接口热点路径性能测试")
+    parser.add_argument("--number", type=int, default=100_000, help="每项测试的调用次数")
+    parser.add_argument("--output", help="JSON结果输出文件路径")
+    args = parser.parse_args()
+
+    results: list[dict] = []
+    for bench in BENCHMARKS:
+        result: dict = bench(args.number)
+        results.append(result)
+
+        print(
+            f"{result['name']:<30}"
+            f"{result['throughput']:>12,.0f} 次/秒"
+            f"{result['mean_ns']:>10,.0f} ns"
+            f"{result['p50_ns']:>10,} ns(p50)"
+            f"{result['p99_ns']:>10,} ns(p99)"
+        )
+
+    report: dict = {
+        "version": vnpy_femas.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "datetime": datetime.now().isoformat(),
+        "number": args.number,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+from datetime import datetime
+from timeit import timeit
+
+from vnpy_femas.gateway.femas_gateway import CHINA_TZ, TimestampDecoder
+
+
+NUMBER: int = 100_000
+
+
+def parse_strptime(date: str, time: str, millisec: int) -> datetime:
+    """原有strptime解析逻辑"""
+    timestamp: str = f"{date} {time}.{int(millisec / 100)}"
+    dt: datetime = datetime.strptime(timestamp, "%Y%m%d %H:%M:%S.%f")
+    return dt.replace(tzinfo=CHINA_TZ)
+
+
+def generate_samples() -> list[tuple[str, str, int]]:
+    """生成模拟行情时间戳，每秒两笔推送"""
+    samples: list[tuple[str, str, int]] = []
+
+    for i in range(NUMBER):
+        seconds: int = i // 2
+        time: str = f"{9 + seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        millisec: int = 500 if i % 2 else 0
+        samples.append(("20240102", time, millisec))
+
+    return samples
+
+
+def main() -> None:
+    """主入口函数"""
+    samples: list[tuple[str, str, int]] = generate_samples()
+    decoder: TimestampDecoder = TimestampDecoder()
+
+    # 校验解析结果和原有逻辑完全一致
+    for date, time, millisec in samples:
+        assert decoder.decode(date, time, millisec) == parse_strptime(date, time, millisec)
+
+    for millisec in range(1000):
+        assert decoder.decode("20240102", "21:00:00", millisec) == parse_strptime("20240102", "21:00:00", millisec)
+
+    def run_strptime() -> None:
+        for sample in samples:
+            parse_strptime(*sample)
+
+    def run_decoder() -> None:
+        d: TimestampDecoder = TimestampDecoder()
+        for sample in samples:
+            d.decode(*sample)
+
+    cost_strptime: float = timeit(run_strptime, number=1)
+    cost_decoder: float = timeit(run_decoder, number=1)
+
+    print(f"strptime: {cost_strptime / NUMBER * 1e9:.0f} ns/次")
+    print(f"decoder:  {cost_decoder / NUMBER * 1e9:.0f} ns/次")
+    print(f"加速比:   {cost_strptime / cost_decoder:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
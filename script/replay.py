@@ -0,0 +1,42 @@
+from argparse import ArgumentParser
+from time import perf_counter
+
+from vnpy.event import EventEngine
+from vnpy.trader.event import EVENT_LOG, EVENT_TICK
+
+from vnpy_femas import FemasGateway
+from vnpy_femas.gateway.femas_replay import CallbackReplayer
+
+
+def main() -> None:
+    """主入口函数"""
+    parser: ArgumentParser = ArgumentParser(description="回放飞马接口回调录制文件")
+    parser.add_argument("path", help="录制文件路径")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，0为不等待尽快回放")
+    args = parser.parse_args()
+
+    event_engine: EventEngine = EventEngine()
+    event_engine.register(EVENT_LOG, lambda event: print(event.data.msg))
+
+    tick_count: list[int] = [0]
+
+    def process_tick_event(event: object) -> None:
+        tick_count[0] += 1
+
+    event_engine.register(EVENT_TICK, process_tick_event)
+    event_engine.start()
+
+    gateway: FemasGateway = FemasGateway(event_engine, "FEMAS")
+    replayer: CallbackReplayer = CallbackReplayer(gateway)
+
+    start: float = perf_counter()
+    count: int = replayer.replay(args.path, args.speed)
+    cost: float = perf_counter() - start
+
+    event_engine.stop()
+
+    print(f"回放回调{count}条，收到行情{tick_count[0]}条，耗时{cost:.3f}秒")
+
+
+if __name__ == "__main__":
+    main()
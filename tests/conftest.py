@@ -0,0 +1,5 @@
+import os
+
+
+# 测试环境中没有飞马底层接口库，使用纯Python替身
+os.environ.setdefault("VNPY_FEMAS_STUB", "1")
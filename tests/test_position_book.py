@@ -0,0 +1,77 @@
+from vnpy.event import EventEngine
+from vnpy.trader.constant import Direction, Exchange, Offset
+from vnpy.trader.object import PositionData
+
+from vnpy_femas.api import (
+    USTP_FTDC_D_Buy,
+    USTP_FTDC_OF_CloseToday,
+    USTP_FTDC_OF_CloseYesterday
+)
+from vnpy_femas.gateway.femas_gateway import (
+    OFFSET_FEMAS2VT,
+    OFFSET_VT2FEMAS,
+    FemasGateway,
+    FemasTdApi
+)
+
+
+SYMBOL: str = "rb2501"
+
+
+def create_td_api() -> FemasTdApi:
+    """创建持仓簿中已有10手空头持仓（其中昨仓5手）的交易接口"""
+    gateway: FemasGateway = FemasGateway(EventEngine(), "FEMAS")
+    td_api: FemasTdApi = gateway.td_api
+
+    td_api.book_inited = True
+    td_api.positions[(SYMBOL, Direction.SHORT)] = PositionData(
+        symbol=SYMBOL,
+        exchange=Exchange.SHFE,
+        direction=Direction.SHORT,
+        volume=10,
+        yd_volume=5,
+        gateway_name=gateway.gateway_name,
+    )
+    return td_api
+
+
+def generate_trade(tradeid: str, offset_flag: str, volume: int) -> dict:
+    """生成买平成交推送数据"""
+    return {
+        "TradeID": tradeid,
+        "TradingDay": "20240102",
+        "TradeDate": "20240102",
+        "TradeTime": "09:30:00",
+        "InstrumentID": SYMBOL,
+        "ExchangeID": "SHFE",
+        "UserOrderLocalID": tradeid.rjust(12, "0"),
+        "Direction": USTP_FTDC_D_Buy,
+        "OffsetFlag": offset_flag,
+        "TradePrice": 3000.0,
+        "TradeVolume": volume,
+    }
+
+
+def test_offset_mapping() -> None:
+    assert OFFSET_FEMAS2VT[USTP_FTDC_OF_CloseToday] == Offset.CLOSETODAY
+    assert OFFSET_FEMAS2VT[USTP_FTDC_OF_CloseYesterday] == Offset.CLOSEYESTERDAY
+    assert OFFSET_VT2FEMAS[Offset.CLOSETODAY] == USTP_FTDC_OF_CloseToday
+    assert OFFSET_VT2FEMAS[Offset.CLOSEYESTERDAY] == USTP_FTDC_OF_CloseYesterday
+
+
+def test_close_today_keeps_yd_volume() -> None:
+    td_api: FemasTdApi = create_td_api()
+    td_api.onRtnTrade(generate_trade("1", USTP_FTDC_OF_CloseToday, 3))
+
+    position: PositionData = td_api.positions[(SYMBOL, Direction.SHORT)]
+    assert position.volume == 7
+    assert position.yd_volume == 5
+
+
+def test_close_yesterday_reduces_yd_volume() -> None:
+    td_api: FemasTdApi = create_td_api()
+    td_api.onRtnTrade(generate_trade("1", USTP_FTDC_OF_CloseYesterday, 3))
+
+    position: PositionData = td_api.positions[(SYMBOL, Direction.SHORT)]
+    assert position.volume == 7
+    assert position.yd_volume == 2
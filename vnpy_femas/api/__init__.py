@@ -1,3 +1,22 @@
-from .vnfemasmd import MdApi      # noqa
-from .vnfemastd import TdApi      # noqa
+import os
+
+
+# 设置环境变量VNPY_FEMAS_STUB=1时使用纯Python替身，仅用于离线回放和性能测试
+STUB_REQUESTED: bool = os.environ.get("VNPY_FEMAS_STUB", "") == "1"
+
+if not STUB_REQUESTED:
+    try:
+        from .vnfemasmd import MdApi      # noqa
+        from .vnfemastd import TdApi      # noqa
+    except ImportError as e:
+        raise ImportError(
+            f"飞马底层接口库加载失败：{e!r}，离线回放或性能测试时可设置环境变量VNPY_FEMAS_STUB=1使用替身"
+        ) from e
+
+    NATIVE_AVAILABLE: bool = True
+else:
+    from .femas_stub import MdApi, TdApi      # noqa
+
+    NATIVE_AVAILABLE = False
+
 from .femas_constant import *     # noqa
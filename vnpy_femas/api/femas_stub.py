@@ -0,0 +1,195 @@
+"""
+底层接口的纯Python替身，在无法加载飞马底层接口库时（如Linux下离线回放和性能测试）使用。
+
+替身不会发起任何网络连接，所有主动函数调用都会记录在requests列表中，
+回调函数则由回放工具或测试代码直接调用。
+"""
+
+from collections.abc import Callable
+
+
+class StubApi:
+    """底层接口替身基类"""
+
+    def __init__(self) -> None:
+        """构造函数"""
+        self.requests: list[tuple[str, tuple]] = []
+
+        self.queue_stats: dict = {
+            "depth": 0,
+            "high_water": 0,
+            "oldest_age": 0.0,
+            "capacity": 0,
+            "overflow": 0,
+            "dropped": 0,
+        }
+
+    def __getattr__(self, name: str) -> Callable[..., int]:
+        """所有req开头的请求函数只记录调用参数，并返回0表示发送成功"""
+        if not name.startswith("req"):
+            raise AttributeError(name)
+
+        def request(*args: object) -> int:
+            self.requests.append((name, args))
+            return 0
+
+        return request
+
+    def release(self) -> None:
+        """释放接口"""
+        pass
+
+    def init(self) -> None:
+        """初始化接口"""
+        pass
+
+    def join(self) -> int:
+        """等待接口线程结束"""
+        return 0
+
+    def exit(self) -> int:
+        """退出接口"""
+        return 1
+
+    def getTradingDay(self) -> str:
+        """获取交易日"""
+        return ""
+
+    def registerFront(self, address: str) -> None:
+        """注册前置机地址"""
+        pass
+
+    def setBatchMode(self, batch: bool) -> None:
+        """设置批量处理模式"""
+        pass
+
+    def setQueueCapacity(self, capacity: int, policy: int) -> None:
+        """设置回调队列容量和溢出策略"""
+        self.queue_stats["capacity"] = capacity
+
+    def getQueueStats(self) -> dict:
+        """查询回调队列统计数据"""
+        return dict(self.queue_stats)
+
+
+class MdApi(StubApi):
+    """行情接口替身"""
+
+    def createFtdcMdApi(self, path: str | bytes = "") -> None:
+        """创建接口对象"""
+        pass
+
+    def registerNameServer(self, address: str) -> None:
+        """注册名字服务器地址"""
+        pass
+
+    def registerCertificateFile(
+        self,
+        cert_file: str,
+        key_file: str,
+        ca_file: str,
+        key_password: str
+    ) -> int:
+        """注册证书文件"""
+        return 0
+
+    def subscribeMarketDataTopic(self, topic_id: int, resume_type: int) -> None:
+        """订阅行情主题"""
+        pass
+
+    def subMarketData(self, symbol: str) -> int:
+        """订阅合约行情"""
+        self.requests.append(("subMarketData", (symbol,)))
+        return 0
+
+    def unSubMarketData(self, symbol: str) -> int:
+        """退订合约行情"""
+        self.requests.append(("unSubMarketData", (symbol,)))
+        return 0
+
+    def subMarketDataBatch(self, symbols: list[str]) -> int:
+        """批量订阅合约行情"""
+        self.requests.append(("subMarketDataBatch", (list(symbols),)))
+        return 0
+
+    def unSubMarketDataBatch(self, symbols: list[str]) -> int:
+        """批量退订合约行情"""
+        self.requests.append(("unSubMarketDataBatch", (list(symbols),)))
+        return 0
+
+    def setHeartbeatTimeout(self, timeout: int) -> None:
+        """设置心跳超时时间"""
+        pass
+
+    def setTickBatchMode(self, batch: bool) -> None:
+        """设置行情批量推送模式"""
+        pass
+
+    def setCompactMode(self, compact: bool) -> None:
+        """设置精简行情模式"""
+        pass
+
+    def setConflateMode(self, conflate: bool) -> None:
+        """设置行情合并模式"""
+        pass
+
+    def getConflateDropped(self) -> dict:
+        """查询各合约被合并丢弃的行情数量"""
+        return {}
+
+    def setLatencyMode(self, latency: bool) -> None:
+        """设置延时统计模式"""
+        pass
+
+    def getLatencyStats(self) -> dict:
+        """查询底层延时统计数据"""
+        return {}
+
+    def resetLatencyStats(self) -> None:
+        """清空底层延时统计数据"""
+        pass
+
+
+class TdApi(StubApi):
+    """交易接口替身"""
+
+    def __init__(self) -> None:
+        """构造函数"""
+        super().__init__()
+
+        self.templates: list[dict] = []
+
+    def createFtdcTraderApi(self, path: str = "") -> None:
+        """创建接口对象"""
+        pass
+
+    def subscribePrivateTopic(self, resume_type: int) -> None:
+        """订阅私有流"""
+        pass
+
+    def subscribePublicTopic(self, resume_type: int) -> None:
+        """订阅公共流"""
+        pass
+
+    def subscribeUserTopic(self, resume_type: int) -> None:
+        """订阅用户流"""
+        pass
+
+    def createOrderTemplate(self, req: dict) -> int:
+        """创建委托请求模板"""
+        self.templates.append(dict(req))
+        return len(self.templates) - 1
+
+    def clearOrderTemplates(self) -> None:
+        """清空委托请求模板"""
+        self.templates.clear()
+
+    def reqOrderInsertBatch(self, reqs: list[tuple], reqid: int) -> list[int]:
+        """批量委托下单"""
+        self.requests.append(("reqOrderInsertBatch", (reqs, reqid)))
+        return [0] * len(reqs)
+
+    def reqOrderActionBatch(self, reqs: list[dict], reqid: int) -> list[int]:
+        """批量委托撤单"""
+        self.requests.append(("reqOrderActionBatch", (reqs, reqid)))
+        return [0] * len(reqs)
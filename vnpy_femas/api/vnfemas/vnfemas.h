@@ -1,7 +1,12 @@
 #include <string>
 #include <queue>
+#include <deque>
 #include <thread>
 #include <mutex>
+#include <atomic>
+#include <chrono>
+#include <functional>
+#include <unordered_map>
 #include <iostream>
 #include <codecvt>
 #include <condition_variable>
@@ -22,27 +27,89 @@ struct Task
     void *task_error;	//ָ
     int task_id;		//id
     bool task_last;		//ǷΪ󷵻
+    chrono::steady_clock::time_point task_time;	//ʱ
 };
 
 class TerminatedError : std::exception
 {};
 
+//
+#define OVERFLOW_BLOCK 0		//ȴгֿλ
+#define OVERFLOW_DROP 1			//Ŀɶ
+#define OVERFLOW_LOG 2			//ճӣ¼
+
+//ͳ
+struct QueueStats
+{
+    size_t depth;			//ǰг
+    size_t high_water;		//ʷг
+    double oldest_age;		//ĵȴʱ䣨룩
+    size_t capacity;		//0Ϊ
+    long long overflow;		//Ĵ
+    long long dropped;		//ʱ
+};
+
 class TaskQueue
 {
 private:
-    queue<Task> queue_;						//׼
+    deque<Task> queue_;						//׼
     mutex mutex_;							//
     condition_variable cond_;				//
+    condition_variable full_cond_;			//δ
 
     bool _terminate = false;
 
+    size_t capacity_ = 0;					//
+    int policy_ = OVERFLOW_LOG;				//
+    int droppable_ = -1;					//ɶӦĳ
+    std::function<void(Task&)> dropper_;			//ʱͷݵĺ
+
+    size_t high_water_ = 0;
+    long long overflow_ = 0;
+    long long dropped_ = 0;
+
+    //Ŀɶ
+    bool dropOldest()
+    {
+        for (auto it = queue_.begin(); it != queue_.end(); ++it)
+        {
+            if (it->task_name == droppable_)
+            {
+                if (dropper_)
+                    dropper_(*it);
+                queue_.erase(it);
+                dropped_++;
+                return true;
+            }
+        }
+        return false;
+    }
+
 public:
 
     //µ
     void push(const Task &task)
     {
         unique_lock<mutex > mlock(mutex_);
-        queue_.push(task);					//д
+        if (capacity_ && queue_.size() >= capacity_)
+        {
+            overflow_++;
+            if (policy_ == OVERFLOW_BLOCK)
+            {
+                full_cond_.wait(mlock, [&]() {
+                    return !capacity_ || queue_.size() < capacity_ || _terminate;
+                });
+            }
+            else if (policy_ == OVERFLOW_DROP)
+            {
+                dropOldest();				//ûпɶʱճ
+            }
+        }
+
+        queue_.push_back(task);				//д
+        queue_.back().task_time = chrono::steady_clock::now();
+        if (queue_.size() > high_water_)
+            high_water_ = queue_.size();
         mlock.unlock();						//ͷ
         cond_.notify_one();					//֪ͨȴ߳
     }
@@ -57,18 +124,139 @@ public:
         if (_terminate)
             throw TerminatedError();
         Task task = queue_.front();			//ȡеһ
-        queue_.pop();						//ɾ
+        queue_.pop_front();					//ɾ
+        mlock.unlock();
+        if (capacity_)
+            full_cond_.notify_one();		//֪ͨȴλ߳
         return task;						//ظ
     }
 
+    //һȡ
+    deque<Task> popAll()
+    {
+        unique_lock<mutex> mlock(mutex_);
+        cond_.wait(mlock, [&]() {
+            return !queue_.empty() || _terminate;
+        });				//ȴ֪ͨ
+        if (_terminate)
+            throw TerminatedError();
+        deque<Task> tasks;
+        tasks.swap(queue_);					//У
+        mlock.unlock();
+        if (capacity_)
+            full_cond_.notify_all();		//֪ͨȴλ߳
+        return tasks;
+    }
+
     void terminate()
     {
         _terminate = true;
         cond_.notify_all();					//֪ͨȴ߳
+        full_cond_.notify_all();
+    }
+
+    //öԣΪ0ʱ
+    void setCapacity(size_t capacity, int policy)
+    {
+        unique_lock<mutex> mlock(mutex_);
+        capacity_ = capacity;
+        policy_ = policy;
+        mlock.unlock();
+        full_cond_.notify_all();
+    }
+
+    //ʱɶԼʱͷݵĺ
+    void setDroppable(int task_name, std::function<void(Task&)> dropper)
+    {
+        unique_lock<mutex> mlock(mutex_);
+        droppable_ = task_name;
+        dropper_ = dropper;
+    }
+
+    //ȡͳ
+    QueueStats getStats()
+    {
+        unique_lock<mutex> mlock(mutex_);
+        QueueStats stats = QueueStats();
+        stats.depth = queue_.size();
+        stats.high_water = high_water_;
+        stats.capacity = capacity_;
+        stats.overflow = overflow_;
+        stats.dropped = dropped_;
+        if (!queue_.empty())
+        {
+            chrono::duration<double> age = chrono::steady_clock::now() - queue_.front().task_time;
+            stats.oldest_age = age.count();
+        }
+        return stats;
     }
 };
 
 
+//ʱֱͼnͰͳƶλΪnʱ[2^(n-1), 2^n)
+struct LatencyHistogram
+{
+    long long buckets[64] = {};
+    long long count = 0;
+    long long total = 0;
+    long long maximum = 0;
+
+    void record(long long ns)
+    {
+        if (ns < 0)
+        {
+            ns = 0;
+        }
+
+        int n = 0;
+        for (unsigned long long v = ns; v; v >>= 1)
+        {
+            n++;
+        }
+
+        buckets[n]++;
+        count++;
+        total += ns;
+        if (ns > maximum)
+        {
+            maximum = ns;
+        }
+    }
+};
+
+
+//ʱֱͼתΪֵ
+inline dict toDict(const LatencyHistogram &histogram)
+{
+    pybind11::list buckets;
+    for (long long n : histogram.buckets)
+    {
+        buckets.append(n);
+    }
+
+    dict data;
+    data["buckets"] = buckets;
+    data["count"] = histogram.count;
+    data["total"] = histogram.total;
+    data["max"] = histogram.maximum;
+    return data;
+}
+
+
+//ͳתΪֵ
+inline dict toDict(const QueueStats &stats)
+{
+    dict data;
+    data["depth"] = stats.depth;
+    data["high_water"] = stats.high_water;
+    data["oldest_age"] = stats.oldest_age;
+    data["capacity"] = stats.capacity;
+    data["overflow"] = stats.overflow;
+    data["dropped"] = stats.dropped;
+    return data;
+}
+
+
 //ֵлȡĳֵӦֵṹֵ
 void getInt(const dict &d, const char *key, int *value)
 {
@@ -115,6 +115,25 @@ void MdApi::OnRtnDepthMarketData(CUstpFtdcDepthMarketDataField *pDepthMarketData
 		CUstpFtdcDepthMarketDataField *task_data = new CUstpFtdcDepthMarketDataField();
 		*task_data = *pDepthMarketData;
 		task.task_data = task_data;
+
+		//ϲģʽ£úԼδ飬ֱӸΪ¿
+		if (this->conflate_mode)
+		{
+			unique_lock<mutex> mlock(this->conflate_mutex);
+			if (this->conflate_mode)
+			{
+				string symbol = task_data->InstrumentID;
+				auto it = this->conflate_pending.find(symbol);
+				if (it != this->conflate_pending.end())
+				{
+					*it->second = *task_data;
+					this->conflate_dropped[symbol]++;
+					delete task_data;
+					return;
+				}
+				this->conflate_pending[symbol] = task_data;
+			}
+		}
 	}
 	this->task_queue.push(task);
 };
@@ -213,100 +232,148 @@ void MdApi::OnRspGetMarketData(CUstpFtdcRspDepthMarketDataField *pRspDepthMarket
 
 void MdApi::processTask()
 {
-    try
-    {
-        while (this->active)
-        {
-            Task task = this->task_queue.pop();
-            
-            switch (task.task_name)
-            {
-			case ONFRONTCONNECTED:
+	try
+	{
+		while (this->active)
+		{
+			if (this->batch_mode)
 			{
-				this->processFrontConnected(&task);
-				break;
+				//ģʽһȡ񣬲ֻȡһGIL
+				deque<Task> tasks = this->task_queue.popAll();
+				gil_scoped_acquire acquire;
+				this->processTaskBatch(tasks);
 			}
-
-			case ONFRONTDISCONNECTED:
+			else
 			{
-				this->processFrontDisconnected(&task);
-				break;
+				Task task = this->task_queue.pop();
+				this->dispatchTask(&task);
 			}
+		}
+	}
+	catch (const TerminatedError&)
+	{
+	}
+};
 
-			case ONHEARTBEATWARNING:
-			{
-				this->processHeartBeatWarning(&task);
-				break;
-			}
+void MdApi::processTaskBatch(deque<Task> &tasks)
+{
+	pybind11::list ticks;
+	while (!tasks.empty())
+	{
+		Task task = tasks.front();
+		tasks.pop_front();
 
-			case ONPACKAGESTART:
+		//ģʽ£ݺϲΪһб
+		if (this->tick_batch_mode && task.task_name == ONRTNDEPTHMARKETDATA)
+		{
+			chrono::steady_clock::time_point start_time;
+			if (this->latency_mode)
 			{
-				this->processPackageStart(&task);
-				break;
+				start_time = chrono::steady_clock::now();
 			}
+			this->removeConflatePending(&task);
+			ticks.append(this->convertDepthMarketData(&task));
+			this->recordLatency(&task, start_time);
+			continue;
+		}
 
-			case ONPACKAGEEND:
-			{
-				this->processPackageEnd(&task);
-				break;
-			}
+		//صǰۻ飬ֻص˳
+		if (ticks.size())
+		{
+			this->onRtnDepthMarketDataBatch(ticks);
+			ticks = pybind11::list();
+		}
+		this->dispatchTask(&task);
+	}
 
-			case ONRSPERROR:
-			{
-				this->processRspError(&task);
-				break;
-			}
+	if (ticks.size())
+	{
+		this->onRtnDepthMarketDataBatch(ticks);
+	}
+};
 
-			case ONRSPUSERLOGIN:
-			{
-				this->processRspUserLogin(&task);
-				break;
-			}
+void MdApi::dispatchTask(Task *task)
+{
+	switch (task->task_name)
+	{
+	case ONFRONTCONNECTED:
+	{
+		this->processFrontConnected(task);
+		break;
+	}
 
-			case ONRSPUSERLOGOUT:
-			{
-				this->processRspUserLogout(&task);
-				break;
-			}
+	case ONFRONTDISCONNECTED:
+	{
+		this->processFrontDisconnected(task);
+		break;
+	}
 
-			case ONRTNDEPTHMARKETDATA:
-			{
-				this->processRtnDepthMarketData(&task);
-				break;
-			}
+	case ONHEARTBEATWARNING:
+	{
+		this->processHeartBeatWarning(task);
+		break;
+	}
 
-			case ONRSPSUBMARKETDATA:
-			{
-				this->processRspSubMarketData(&task);
-				break;
-			}
+	case ONPACKAGESTART:
+	{
+		this->processPackageStart(task);
+		break;
+	}
 
-			case ONRSPUNSUBMARKETDATA:
-			{
-				this->processRspUnSubMarketData(&task);
-				break;
-			}
+	case ONPACKAGEEND:
+	{
+		this->processPackageEnd(task);
+		break;
+	}
 
-			case ONRSPGETMARKETTOPIC:
-			{
-				this->processRspGetMarketTopic(&task);
-				break;
-			}
+	case ONRSPERROR:
+	{
+		this->processRspError(task);
+		break;
+	}
 
-			case ONRSPGETMARKETDATA:
-			{
-				this->processRspGetMarketData(&task);
-				break;
-			}
+	case ONRSPUSERLOGIN:
+	{
+		this->processRspUserLogin(task);
+		break;
+	}
+
+	case ONRSPUSERLOGOUT:
+	{
+		this->processRspUserLogout(task);
+		break;
+	}
+
+	case ONRTNDEPTHMARKETDATA:
+	{
+		this->processRtnDepthMarketData(task);
+		break;
+	}
+
+	case ONRSPSUBMARKETDATA:
+	{
+		this->processRspSubMarketData(task);
+		break;
+	}
 
+	case ONRSPUNSUBMARKETDATA:
+	{
+		this->processRspUnSubMarketData(task);
+		break;
+	}
 
+	case ONRSPGETMARKETTOPIC:
+	{
+		this->processRspGetMarketTopic(task);
+		break;
+	}
 
-            };
-        }
-    }
-    catch (const TerminatedError&)
-    {
-    }
+	case ONRSPGETMARKETDATA:
+	{
+		this->processRspGetMarketData(task);
+		break;
+	}
+	}
 };
 
 void MdApi::processFrontConnected(Task *task)
@@ -410,7 +477,64 @@ void MdApi::processRspUserLogout(Task *task)
 
 void MdApi::processRtnDepthMarketData(Task *task)
 {
+	chrono::steady_clock::time_point start_time;
+	if (this->latency_mode)
+	{
+		start_time = chrono::steady_clock::now();
+	}
+	this->removeConflatePending(task);
+
 	gil_scoped_acquire acquire;
+	object data = this->convertDepthMarketData(task);
+	this->recordLatency(task, start_time);
+	if (isinstance<dict>(data))
+	{
+		this->onRtnDepthMarketData(reinterpret_borrow<dict>(data));
+	}
+	else
+	{
+		this->onRtnDepthMarketDataCompact(data);
+	}
+};
+
+void MdApi::recordLatency(Task *task, chrono::steady_clock::time_point start_time)
+{
+	//¼ӵʼԼʼPythonصȡGILתʱ
+	if (!this->latency_mode || start_time == chrono::steady_clock::time_point())
+	{
+		return;
+	}
+
+	chrono::steady_clock::time_point now = chrono::steady_clock::now();
+	unique_lock<mutex> mlock(this->latency_mutex);
+	this->queue_latency.record(chrono::duration_cast<chrono::nanoseconds>(start_time - task->task_time).count());
+	this->dispatch_latency.record(chrono::duration_cast<chrono::nanoseconds>(now - start_time).count());
+};
+
+void MdApi::removeConflatePending(Task *task)
+{
+	//ϲģʽ£ȽúԼƳ˺յ
+	if (this->conflate_mode && task->task_data)
+	{
+		CUstpFtdcDepthMarketDataField *task_data = (CUstpFtdcDepthMarketDataField*)task->task_data;
+		unique_lock<mutex> mlock(this->conflate_mutex);
+		auto it = this->conflate_pending.find(task_data->InstrumentID);
+		if (it != this->conflate_pending.end() && it->second == task_data)
+		{
+			this->conflate_pending.erase(it);
+		}
+	}
+};
+
+object MdApi::convertDepthMarketData(Task *task)
+{
+	//ģʽֱӽṹȨתPython󣬱⹹ֵ
+	if (this->compact_mode && task->task_data)
+	{
+		CUstpFtdcDepthMarketDataField *task_data = (CUstpFtdcDepthMarketDataField*)task->task_data;
+		return cast(task_data, return_value_policy::take_ownership);
+	}
+
 	dict data;
 	if (task->task_data)
 	{
@@ -474,7 +598,7 @@ void MdApi::processRtnDepthMarketData(Task *task)
 		data["TotalAskVolume"] = task_data->TotalAskVolume;
 		delete task->task_data;
 	}
-	this->onRtnDepthMarketData(data);
+	return data;
 };
 
 void MdApi::processRspSubMarketData(Task *task)
@@ -716,6 +840,75 @@ void MdApi::setHeartbeatTimeout(int timeout)
 	this->api->SetHeartbeatTimeout(timeout);
 }
 
+void MdApi::setBatchMode(bool batch)
+{
+	this->batch_mode = batch;
+}
+
+void MdApi::setTickBatchMode(bool batch)
+{
+	this->tick_batch_mode = batch;
+}
+
+void MdApi::setQueueCapacity(int capacity, int policy)
+{
+	this->task_queue.setCapacity(capacity, policy);
+}
+
+dict MdApi::getQueueStats()
+{
+	return toDict(this->task_queue.getStats());
+}
+
+void MdApi::setCompactMode(bool compact)
+{
+	this->compact_mode = compact;
+}
+
+void MdApi::setConflateMode(bool conflate)
+{
+	unique_lock<mutex> mlock(this->conflate_mutex);
+	this->conflate_mode = conflate;
+
+	//رպϲٸٴ飬ӵճ
+	if (!conflate)
+	{
+		this->conflate_pending.clear();
+	}
+}
+
+void MdApi::setLatencyMode(bool latency)
+{
+	this->latency_mode = latency;
+}
+
+dict MdApi::getLatencyStats()
+{
+	dict data;
+	unique_lock<mutex> mlock(this->latency_mutex);
+	data["queue"] = toDict(this->queue_latency);
+	data["dispatch"] = toDict(this->dispatch_latency);
+	return data;
+}
+
+void MdApi::resetLatencyStats()
+{
+	unique_lock<mutex> mlock(this->latency_mutex);
+	this->queue_latency = LatencyHistogram();
+	this->dispatch_latency = LatencyHistogram();
+}
+
+dict MdApi::getConflateDropped()
+{
+	dict data;
+	unique_lock<mutex> mlock(this->conflate_mutex);
+	for (auto &it : this->conflate_dropped)
+	{
+		data[it.first.c_str()] = it.second;
+	}
+	return data;
+}
+
 
 
 void MdApi::subscribeMarketDataTopic(int topicID, int resumeType)
@@ -764,6 +957,43 @@ int MdApi::unSubMarketData(string instrumentID)
 	return i;
 }
 
+int MdApi::subMarketDataBatch(const pybind11::list &instrumentIDs)
+{
+	//ȸȫԼ룬ָһԶ
+	vector<string> symbols;
+	for (auto item : instrumentIDs)
+	{
+		symbols.push_back(item.cast<string>());
+	}
+
+	vector<char*> myreq;
+	for (string &symbol : symbols)
+	{
+		myreq.push_back((char*)symbol.c_str());
+	}
+
+	int i = this->api->SubMarketData(myreq.data(), (int)myreq.size());
+	return i;
+}
+
+int MdApi::unSubMarketDataBatch(const pybind11::list &instrumentIDs)
+{
+	vector<string> symbols;
+	for (auto item : instrumentIDs)
+	{
+		symbols.push_back(item.cast<string>());
+	}
+
+	vector<char*> myreq;
+	for (string &symbol : symbols)
+	{
+		myreq.push_back((char*)symbol.c_str());
+	}
+
+	int i = this->api->UnSubMarketData(myreq.data(), (int)myreq.size());
+	return i;
+}
+
 void MdApi::registerNameServer(string pszNsAddress)
 {
 	this->api->RegisterNameServer((char*)pszNsAddress.c_str());
@@ -888,6 +1118,30 @@ public:
 		}
 	};
 
+	void onRtnDepthMarketDataCompact(const object &data) override
+	{
+		try
+		{
+			PYBIND11_OVERLOAD(void, MdApi, onRtnDepthMarketDataCompact, data);
+		}
+		catch (const error_already_set &e)
+		{
+			cout << e.what() << endl;
+		}
+	};
+
+	void onRtnDepthMarketDataBatch(const pybind11::list &data) override
+	{
+		try
+		{
+			PYBIND11_OVERLOAD(void, MdApi, onRtnDepthMarketDataBatch, data);
+		}
+		catch (const error_already_set &e)
+		{
+			cout << e.what() << endl;
+		}
+	};
+
 	void onRspSubMarketData(const dict &data, const dict &error, int reqid, bool last) override
 	{
 		try
@@ -944,6 +1198,98 @@ public:
 
 PYBIND11_MODULE(vnfemasmd, m)
 {
+	//󣬰ԻȡֶΣֶַڷʱת
+	class_<CUstpFtdcDepthMarketDataField> depth(m, "DepthMarketData", module_local());
+	depth
+		.def_readonly("SettlementID", &CUstpFtdcDepthMarketDataField::SettlementID)
+		.def_readonly("PreSettlementPrice", &CUstpFtdcDepthMarketDataField::PreSettlementPrice)
+		.def_readonly("PreClosePrice", &CUstpFtdcDepthMarketDataField::PreClosePrice)
+		.def_readonly("PreOpenInterest", &CUstpFtdcDepthMarketDataField::PreOpenInterest)
+		.def_readonly("PreDelta", &CUstpFtdcDepthMarketDataField::PreDelta)
+		.def_readonly("OpenPrice", &CUstpFtdcDepthMarketDataField::OpenPrice)
+		.def_readonly("HighestPrice", &CUstpFtdcDepthMarketDataField::HighestPrice)
+		.def_readonly("LowestPrice", &CUstpFtdcDepthMarketDataField::LowestPrice)
+		.def_readonly("ClosePrice", &CUstpFtdcDepthMarketDataField::ClosePrice)
+		.def_readonly("UpperLimitPrice", &CUstpFtdcDepthMarketDataField::UpperLimitPrice)
+		.def_readonly("LowerLimitPrice", &CUstpFtdcDepthMarketDataField::LowerLimitPrice)
+		.def_readonly("SettlementPrice", &CUstpFtdcDepthMarketDataField::SettlementPrice)
+		.def_readonly("CurrDelta", &CUstpFtdcDepthMarketDataField::CurrDelta)
+		.def_readonly("LastPrice", &CUstpFtdcDepthMarketDataField::LastPrice)
+		.def_readonly("Volume", &CUstpFtdcDepthMarketDataField::Volume)
+		.def_readonly("Turnover", &CUstpFtdcDepthMarketDataField::Turnover)
+		.def_readonly("OpenInterest", &CUstpFtdcDepthMarketDataField::OpenInterest)
+		.def_readonly("BidPrice1", &CUstpFtdcDepthMarketDataField::BidPrice1)
+		.def_readonly("BidVolume1", &CUstpFtdcDepthMarketDataField::BidVolume1)
+		.def_readonly("AskPrice1", &CUstpFtdcDepthMarketDataField::AskPrice1)
+		.def_readonly("AskVolume1", &CUstpFtdcDepthMarketDataField::AskVolume1)
+		.def_readonly("BidPrice2", &CUstpFtdcDepthMarketDataField::BidPrice2)
+		.def_readonly("BidVolume2", &CUstpFtdcDepthMarketDataField::BidVolume2)
+		.def_readonly("BidPrice3", &CUstpFtdcDepthMarketDataField::BidPrice3)
+		.def_readonly("BidVolume3", &CUstpFtdcDepthMarketDataField::BidVolume3)
+		.def_readonly("AskPrice2", &CUstpFtdcDepthMarketDataField::AskPrice2)
+		.def_readonly("AskVolume2", &CUstpFtdcDepthMarketDataField::AskVolume2)
+		.def_readonly("AskPrice3", &CUstpFtdcDepthMarketDataField::AskPrice3)
+		.def_readonly("AskVolume3", &CUstpFtdcDepthMarketDataField::AskVolume3)
+		.def_readonly("BidPrice4", &CUstpFtdcDepthMarketDataField::BidPrice4)
+		.def_readonly("BidVolume4", &CUstpFtdcDepthMarketDataField::BidVolume4)
+		.def_readonly("BidPrice5", &CUstpFtdcDepthMarketDataField::BidPrice5)
+		.def_readonly("BidVolume5", &CUstpFtdcDepthMarketDataField::BidVolume5)
+		.def_readonly("AskPrice4", &CUstpFtdcDepthMarketDataField::AskPrice4)
+		.def_readonly("AskVolume4", &CUstpFtdcDepthMarketDataField::AskVolume4)
+		.def_readonly("AskPrice5", &CUstpFtdcDepthMarketDataField::AskPrice5)
+		.def_readonly("AskVolume5", &CUstpFtdcDepthMarketDataField::AskVolume5)
+		.def_readonly("UpdateMillisec", &CUstpFtdcDepthMarketDataField::UpdateMillisec)
+		.def_readonly("HisHighestPrice", &CUstpFtdcDepthMarketDataField::HisHighestPrice)
+		.def_readonly("HisLowestPrice", &CUstpFtdcDepthMarketDataField::HisLowestPrice)
+		.def_readonly("LatestVolume", &CUstpFtdcDepthMarketDataField::LatestVolume)
+		.def_readonly("InitVolume", &CUstpFtdcDepthMarketDataField::InitVolume)
+		.def_readonly("ChangeVolume", &CUstpFtdcDepthMarketDataField::ChangeVolume)
+		.def_readonly("BidImplyVolume", &CUstpFtdcDepthMarketDataField::BidImplyVolume)
+		.def_readonly("AskImplyVolume", &CUstpFtdcDepthMarketDataField::AskImplyVolume)
+		.def_readonly("AvgPrice", &CUstpFtdcDepthMarketDataField::AvgPrice)
+		.def_readonly("ArbiType", &CUstpFtdcDepthMarketDataField::ArbiType)
+		.def_readonly("TotalBidVolume", &CUstpFtdcDepthMarketDataField::TotalBidVolume)
+		.def_readonly("TotalAskVolume", &CUstpFtdcDepthMarketDataField::TotalAskVolume)
+		.def_property_readonly("TradingDay", [](const CUstpFtdcDepthMarketDataField &d) { return string(d.TradingDay); })
+		.def_property_readonly("SettlementGroupID", [](const CUstpFtdcDepthMarketDataField &d) { return string(d.SettlementGroupID); })
+		.def_property_readonly("InstrumentID", [](const CUstpFtdcDepthMarketDataField &d) { return string(d.InstrumentID); })
+		.def_property_readonly("UpdateTime", [](const CUstpFtdcDepthMarketDataField &d) { return string(d.UpdateTime); })
+		.def_property_readonly("ActionDay", [](const CUstpFtdcDepthMarketDataField &d) { return string(d.ActionDay); })
+		.def_property_readonly("InstrumentID_1", [](const CUstpFtdcDepthMarketDataField &d) { return string(d.InstrumentID_1); })
+		.def_property_readonly("InstrumentID_2", [](const CUstpFtdcDepthMarketDataField &d) { return string(d.InstrumentID_2); })
+		.def_property_readonly("InstrumentName", [](const CUstpFtdcDepthMarketDataField &d) { return toUtf(d.InstrumentName); })
+		.def("__getitem__", [](const object &self, const string &key) {
+			if (key.empty() || key[0] == '_' || !hasattr(self, key.c_str()))
+			{
+				throw key_error(key);
+			}
+			return object(self.attr(key.c_str()));
+		})
+		.def("__contains__", [](const object &self, const string &key) {
+			return !key.empty() && key[0] != '_' && hasattr(self, key.c_str());
+		})
+		.def("get", [](const object &self, const string &key, const object &default_value) {
+			if (key.empty() || key[0] == '_' || !hasattr(self, key.c_str()))
+			{
+				return default_value;
+			}
+			return object(self.attr(key.c_str()));
+		}, arg("key"), arg("default") = none())
+		.def("keys", [](const object &self) {
+			//ֶξֻעᣬֵег
+			list keys;
+			object property_type = module_::import("builtins").attr("property");
+			for (auto item : dict(type::of(self).attr("__dict__")))
+			{
+				if (isinstance(item.second, property_type))
+				{
+					keys.append(item.first);
+				}
+			}
+			return keys;
+		})
+		;
+
 	class_<MdApi, PyMdApi> mdapi(m, "MdApi", module_local());
 	mdapi
 		.def(init<>())
@@ -959,7 +1305,19 @@ PYBIND11_MODULE(vnfemasmd, m)
 		.def("subscribeMarketDataTopic", &MdApi::subscribeMarketDataTopic)
 		.def("subMarketData", &MdApi::subMarketData)
 		.def("unSubMarketData", &MdApi::unSubMarketData)
+		.def("subMarketDataBatch", &MdApi::subMarketDataBatch)
+		.def("unSubMarketDataBatch", &MdApi::unSubMarketDataBatch)
 		.def("setHeartbeatTimeout", &MdApi::setHeartbeatTimeout)
+		.def("setBatchMode", &MdApi::setBatchMode)
+		.def("setTickBatchMode", &MdApi::setTickBatchMode)
+		.def("setQueueCapacity", &MdApi::setQueueCapacity)
+		.def("getQueueStats", &MdApi::getQueueStats)
+		.def("setCompactMode", &MdApi::setCompactMode)
+		.def("setConflateMode", &MdApi::setConflateMode)
+		.def("getConflateDropped", &MdApi::getConflateDropped)
+		.def("setLatencyMode", &MdApi::setLatencyMode)
+		.def("getLatencyStats", &MdApi::getLatencyStats)
+		.def("resetLatencyStats", &MdApi::resetLatencyStats)
 		.def("reqUserLogin", &MdApi::reqUserLogin)
 		.def("reqUserLogout", &MdApi::reqUserLogout)
 
@@ -972,6 +1330,8 @@ PYBIND11_MODULE(vnfemasmd, m)
 		.def("onRspUserLogin", &MdApi::onRspUserLogin)
 		.def("onRspUserLogout", &MdApi::onRspUserLogout)
 		.def("onRtnDepthMarketData", &MdApi::onRtnDepthMarketData)
+		.def("onRtnDepthMarketDataCompact", &MdApi::onRtnDepthMarketDataCompact)
+		.def("onRtnDepthMarketDataBatch", &MdApi::onRtnDepthMarketDataBatch)
 		.def("onRspSubMarketData", &MdApi::onRspSubMarketData)
 		.def("onRspUnSubMarketData", &MdApi::onRspUnSubMarketData)
 		.def("onRspGetMarketTopic", &MdApi::onRspGetMarketTopic)
@@ -41,10 +41,29 @@ private:
 	thread task_thread;					//ָ߳루pythonݣ
 	TaskQueue task_queue;			    //
 	bool active = false;				//״̬
+	bool batch_mode = false;			//ģʽ
+	bool tick_batch_mode = false;		//ģʽ
+	bool compact_mode = false;			//ģʽ
+	atomic<bool> conflate_mode{ false };	//ϲģʽ
+	mutex conflate_mutex;				//ϲ
+	unordered_map<string, CUstpFtdcDepthMarketDataField*> conflate_pending;	//Լδ
+	unordered_map<string, long long> conflate_dropped;	//Լϲ
+	atomic<bool> latency_mode{ false };	//ʱͳģʽ
+	mutex latency_mutex;				//ʱͳƻ
+	LatencyHistogram queue_latency;		//ӵʼʱ
+	LatencyHistogram dispatch_latency;	//ӿʼPythonصʱ
 
 public:
 	MdApi()
 	{
+		//ʱֻ
+		this->task_queue.setDroppable(ONRTNDEPTHMARKETDATA, [this](Task &task) {
+			if (task.task_data)
+			{
+				this->removeConflatePending(&task);
+				delete (CUstpFtdcDepthMarketDataField*)task.task_data;
+			}
+		});
 	};
 
 	~MdApi()
@@ -116,6 +135,14 @@ public:
 
 	void processTask();
 
+	void processTaskBatch(deque<Task> &tasks);
+
+	void dispatchTask(Task *task);
+
+	void removeConflatePending(Task *task);
+
+	object convertDepthMarketData(Task *task);
+
 	void processFrontConnected(Task *task);
 
 	void processFrontDisconnected(Task *task);
@@ -168,6 +195,10 @@ public:
 
 	virtual void onRtnDepthMarketData(const dict &data) {};
 
+	virtual void onRtnDepthMarketDataCompact(const object &data) {};
+
+	virtual void onRtnDepthMarketDataBatch(const pybind11::list &data) {};
+
 
 	virtual void onRspSubMarketData(const dict &data, const dict &error, int reqid, bool last) {};
 
@@ -206,8 +237,34 @@ public:
 
 	int unSubMarketData(string instrumentID);
 
+	int subMarketDataBatch(const pybind11::list &instrumentIDs);
+
+	int unSubMarketDataBatch(const pybind11::list &instrumentIDs);
+
+	void setLatencyMode(bool latency);
+
+	dict getLatencyStats();
+
+	void resetLatencyStats();
+
+	void recordLatency(Task *task, chrono::steady_clock::time_point start_time);
+
 	void setHeartbeatTimeout(int timeout);
 
+	void setBatchMode(bool batch);
+
+	void setTickBatchMode(bool batch);
+
+	void setQueueCapacity(int capacity, int policy);
+
+	dict getQueueStats();
+
+	void setCompactMode(bool compact);
+
+	void setConflateMode(bool conflate);
+
+	dict getConflateDropped();
+
 	int reqUserLogin(const dict &req, int reqid);
 
 	int reqUserLogout(const dict &req, int reqid);
@@ -1033,365 +1033,382 @@ void TdApi::processTask()
 	{
 		while (this->active)
 		{
-			Task task = this->task_queue.pop();
-
-			switch (task.task_name)
-			{
-			case ONFRONTCONNECTED:
+			if (this->batch_mode)
 			{
-				this->processFrontConnected(&task);
-				break;
+				//ģʽһȡ񣬲ֻȡһGIL
+				deque<Task> tasks = this->task_queue.popAll();
+				gil_scoped_acquire acquire;
+				while (!tasks.empty())
+				{
+					Task task = tasks.front();
+					tasks.pop_front();
+					this->dispatchTask(&task);
+				}
 			}
-
-			case ONQRYFRONTCONNECTED:
+			else
 			{
-				this->processQryFrontConnected(&task);
-				break;
+				Task task = this->task_queue.pop();
+				this->dispatchTask(&task);
 			}
+		}
+	}
+	catch (const TerminatedError&)
+	{
+	}
+};
 
-			case ONFRONTDISCONNECTED:
-			{
-				this->processFrontDisconnected(&task);
-				break;
-			}
+void TdApi::dispatchTask(Task *task)
+{
+	switch (task->task_name)
+	{
+	case ONFRONTCONNECTED:
+	{
+		this->processFrontConnected(task);
+		break;
+	}
 
-			case ONQRYFRONTDISCONNECTED:
-			{
-				this->processQryFrontDisconnected(&task);
-				break;
-			}
+	case ONQRYFRONTCONNECTED:
+	{
+		this->processQryFrontConnected(task);
+		break;
+	}
 
-			case ONHEARTBEATWARNING:
-			{
-				this->processHeartBeatWarning(&task);
-				break;
-			}
+	case ONFRONTDISCONNECTED:
+	{
+		this->processFrontDisconnected(task);
+		break;
+	}
 
-			case ONPACKAGESTART:
-			{
-				this->processPackageStart(&task);
-				break;
-			}
+	case ONQRYFRONTDISCONNECTED:
+	{
+		this->processQryFrontDisconnected(task);
+		break;
+	}
 
-			case ONPACKAGEEND:
-			{
-				this->processPackageEnd(&task);
-				break;
-			}
+	case ONHEARTBEATWARNING:
+	{
+		this->processHeartBeatWarning(task);
+		break;
+	}
 
-			case ONRSPERROR:
-			{
-				this->processRspError(&task);
-				break;
-			}
+	case ONPACKAGESTART:
+	{
+		this->processPackageStart(task);
+		break;
+	}
 
-			case ONRSPUSERLOGIN:
-			{
-				this->processRspUserLogin(&task);
-				break;
-			}
+	case ONPACKAGEEND:
+	{
+		this->processPackageEnd(task);
+		break;
+	}
 
-			case ONRSPUSERLOGOUT:
-			{
-				this->processRspUserLogout(&task);
-				break;
-			}
+	case ONRSPERROR:
+	{
+		this->processRspError(task);
+		break;
+	}
 
-			case ONRSPUSERPASSWORDUPDATE:
-			{
-				this->processRspUserPasswordUpdate(&task);
-				break;
-			}
+	case ONRSPUSERLOGIN:
+	{
+		this->processRspUserLogin(task);
+		break;
+	}
 
-			case ONRSPORDERINSERT:
-			{
-				this->processRspOrderInsert(&task);
-				break;
-			}
+	case ONRSPUSERLOGOUT:
+	{
+		this->processRspUserLogout(task);
+		break;
+	}
 
-			case ONRSPORDERACTION:
-			{
-				this->processRspOrderAction(&task);
-				break;
-			}
+	case ONRSPUSERPASSWORDUPDATE:
+	{
+		this->processRspUserPasswordUpdate(task);
+		break;
+	}
 
-			case ONRSPQUOTEINSERT:
-			{
-				this->processRspQuoteInsert(&task);
-				break;
-			}
+	case ONRSPORDERINSERT:
+	{
+		this->processRspOrderInsert(task);
+		break;
+	}
 
-			case ONRSPQUOTEACTION:
-			{
-				this->processRspQuoteAction(&task);
-				break;
-			}
+	case ONRSPORDERACTION:
+	{
+		this->processRspOrderAction(task);
+		break;
+	}
 
-			case ONRSPFORQUOTE:
-			{
-				this->processRspForQuote(&task);
-				break;
-			}
+	case ONRSPQUOTEINSERT:
+	{
+		this->processRspQuoteInsert(task);
+		break;
+	}
 
-			case ONRSPMARGINCOMBACTION:
-			{
-				this->processRspMarginCombAction(&task);
-				break;
-			}
+	case ONRSPQUOTEACTION:
+	{
+		this->processRspQuoteAction(task);
+		break;
+	}
 
-			case ONRSPUSERDEPOSIT:
-			{
-				this->processRspUserDeposit(&task);
-				break;
-			}
+	case ONRSPFORQUOTE:
+	{
+		this->processRspForQuote(task);
+		break;
+	}
 
-			case ONRTNFLOWMESSAGECANCEL:
-			{
-				this->processRtnFlowMessageCancel(&task);
-				break;
-			}
+	case ONRSPMARGINCOMBACTION:
+	{
+		this->processRspMarginCombAction(task);
+		break;
+	}
 
-			case ONRTNTRADE:
-			{
-				this->processRtnTrade(&task);
-				break;
-			}
+	case ONRSPUSERDEPOSIT:
+	{
+		this->processRspUserDeposit(task);
+		break;
+	}
 
-			case ONRTNORDER:
-			{
-				this->processRtnOrder(&task);
-				break;
-			}
+	case ONRTNFLOWMESSAGECANCEL:
+	{
+		this->processRtnFlowMessageCancel(task);
+		break;
+	}
 
-			case ONERRRTNORDERINSERT:
-			{
-				this->processErrRtnOrderInsert(&task);
-				break;
-			}
+	case ONRTNTRADE:
+	{
+		this->processRtnTrade(task);
+		break;
+	}
 
-			case ONERRRTNORDERACTION:
-			{
-				this->processErrRtnOrderAction(&task);
-				break;
-			}
+	case ONRTNORDER:
+	{
+		this->processRtnOrder(task);
+		break;
+	}
 
-			case ONRTNINSTRUMENTSTATUS:
-			{
-				this->processRtnInstrumentStatus(&task);
-				break;
-			}
+	case ONERRRTNORDERINSERT:
+	{
+		this->processErrRtnOrderInsert(task);
+		break;
+	}
 
-			case ONRTNINVESTORACCOUNTDEPOSIT:
-			{
-				this->processRtnInvestorAccountDeposit(&task);
-				break;
-			}
+	case ONERRRTNORDERACTION:
+	{
+		this->processErrRtnOrderAction(task);
+		break;
+	}
 
-			case ONRTNQUOTE:
-			{
-				this->processRtnQuote(&task);
-				break;
-			}
+	case ONRTNINSTRUMENTSTATUS:
+	{
+		this->processRtnInstrumentStatus(task);
+		break;
+	}
 
-			case ONERRRTNQUOTEINSERT:
-			{
-				this->processErrRtnQuoteInsert(&task);
-				break;
-			}
+	case ONRTNINVESTORACCOUNTDEPOSIT:
+	{
+		this->processRtnInvestorAccountDeposit(task);
+		break;
+	}
 
-			case ONERRRTNQUOTEACTION:
-			{
-				this->processErrRtnQuoteAction(&task);
-				break;
-			}
+	case ONRTNQUOTE:
+	{
+		this->processRtnQuote(task);
+		break;
+	}
 
-			case ONRTNFORQUOTE:
-			{
-				this->processRtnForQuote(&task);
-				break;
-			}
+	case ONERRRTNQUOTEINSERT:
+	{
+		this->processErrRtnQuoteInsert(task);
+		break;
+	}
 
-			case ONRTNMARGINCOMBINATIONLEG:
-			{
-				this->processRtnMarginCombinationLeg(&task);
-				break;
-			}
+	case ONERRRTNQUOTEACTION:
+	{
+		this->processErrRtnQuoteAction(task);
+		break;
+	}
 
-			case ONRTNMARGINCOMBACTION:
-			{
-				this->processRtnMarginCombAction(&task);
-				break;
-			}
+	case ONRTNFORQUOTE:
+	{
+		this->processRtnForQuote(task);
+		break;
+	}
 
-			case ONRTNUSERDEPOSIT:
-			{
-				this->processRtnUserDeposit(&task);
-				break;
-			}
+	case ONRTNMARGINCOMBINATIONLEG:
+	{
+		this->processRtnMarginCombinationLeg(task);
+		break;
+	}
 
-			case ONRSPQUERYUSERLOGIN:
-			{
-				this->processRspQueryUserLogin(&task);
-				break;
-			}
+	case ONRTNMARGINCOMBACTION:
+	{
+		this->processRtnMarginCombAction(task);
+		break;
+	}
 
-			case ONRSPQRYORDER:
-			{
-				this->processRspQryOrder(&task);
-				break;
-			}
+	case ONRTNUSERDEPOSIT:
+	{
+		this->processRtnUserDeposit(task);
+		break;
+	}
 
-			case ONRSPQRYTRADE:
-			{
-				this->processRspQryTrade(&task);
-				break;
-			}
+	case ONRSPQUERYUSERLOGIN:
+	{
+		this->processRspQueryUserLogin(task);
+		break;
+	}
 
-			case ONRSPQRYUSERINVESTOR:
-			{
-				this->processRspQryUserInvestor(&task);
-				break;
-			}
+	case ONRSPQRYORDER:
+	{
+		this->processRspQryOrder(task);
+		break;
+	}
 
-			case ONRSPQRYTRADINGCODE:
-			{
-				this->processRspQryTradingCode(&task);
-				break;
-			}
+	case ONRSPQRYTRADE:
+	{
+		this->processRspQryTrade(task);
+		break;
+	}
 
-			case ONRSPQRYINVESTORACCOUNT:
-			{
-				this->processRspQryInvestorAccount(&task);
-				break;
-			}
+	case ONRSPQRYUSERINVESTOR:
+	{
+		this->processRspQryUserInvestor(task);
+		break;
+	}
 
-			case ONRSPQRYINSTRUMENT:
-			{
-				this->processRspQryInstrument(&task);
-				break;
-			}
+	case ONRSPQRYTRADINGCODE:
+	{
+		this->processRspQryTradingCode(task);
+		break;
+	}
 
-			case ONRSPQRYEXCHANGE:
-			{
-				this->processRspQryExchange(&task);
-				break;
-			}
+	case ONRSPQRYINVESTORACCOUNT:
+	{
+		this->processRspQryInvestorAccount(task);
+		break;
+	}
 
-			case ONRSPQRYINVESTORPOSITION:
-			{
-				this->processRspQryInvestorPosition(&task);
-				break;
-			}
+	case ONRSPQRYINSTRUMENT:
+	{
+		this->processRspQryInstrument(task);
+		break;
+	}
 
-			case ONRSPQRYCOMPLIANCEPARAM:
-			{
-				this->processRspQryComplianceParam(&task);
-				break;
-			}
+	case ONRSPQRYEXCHANGE:
+	{
+		this->processRspQryExchange(task);
+		break;
+	}
 
-			case ONRSPQRYINVESTORFEE:
-			{
-				this->processRspQryInvestorFee(&task);
-				break;
-			}
+	case ONRSPQRYINVESTORPOSITION:
+	{
+		this->processRspQryInvestorPosition(task);
+		break;
+	}
 
-			case ONRSPQRYINVESTORMARGIN:
-			{
-				this->processRspQryInvestorMargin(&task);
-				break;
-			}
+	case ONRSPQRYCOMPLIANCEPARAM:
+	{
+		this->processRspQryComplianceParam(task);
+		break;
+	}
 
-			case ONRSPQRYINVESTORCOMBPOSITION:
-			{
-				this->processRspQryInvestorCombPosition(&task);
-				break;
-			}
+	case ONRSPQRYINVESTORFEE:
+	{
+		this->processRspQryInvestorFee(task);
+		break;
+	}
 
-			case ONRSPQRYINVESTORLEGPOSITION:
-			{
-				this->processRspQryInvestorLegPosition(&task);
-				break;
-			}
+	case ONRSPQRYINVESTORMARGIN:
+	{
+		this->processRspQryInvestorMargin(task);
+		break;
+	}
 
-			case ONRSPQRYINSTRUMENTGROUP:
-			{
-				this->processRspQryInstrumentGroup(&task);
-				break;
-			}
+	case ONRSPQRYINVESTORCOMBPOSITION:
+	{
+		this->processRspQryInvestorCombPosition(task);
+		break;
+	}
 
-			case ONRSPQRYCLIENTMARGINCOMBTYPE:
-			{
-				this->processRspQryClientMarginCombType(&task);
-				break;
-			}
+	case ONRSPQRYINVESTORLEGPOSITION:
+	{
+		this->processRspQryInvestorLegPosition(task);
+		break;
+	}
 
-			case ONRSPEXECORDERINSERT:
-			{
-				this->processRspExecOrderInsert(&task);
-				break;
-			}
+	case ONRSPQRYINSTRUMENTGROUP:
+	{
+		this->processRspQryInstrumentGroup(task);
+		break;
+	}
 
-			case ONRSPEXECORDERACTION:
-			{
-				this->processRspExecOrderAction(&task);
-				break;
-			}
+	case ONRSPQRYCLIENTMARGINCOMBTYPE:
+	{
+		this->processRspQryClientMarginCombType(task);
+		break;
+	}
 
-			case ONRTNEXECORDER:
-			{
-				this->processRtnExecOrder(&task);
-				break;
-			}
+	case ONRSPEXECORDERINSERT:
+	{
+		this->processRspExecOrderInsert(task);
+		break;
+	}
 
-			case ONERRRTNEXECORDERINSERT:
-			{
-				this->processErrRtnExecOrderInsert(&task);
-				break;
-			}
+	case ONRSPEXECORDERACTION:
+	{
+		this->processRspExecOrderAction(task);
+		break;
+	}
 
-			case ONERRRTNEXECORDERACTION:
-			{
-				this->processErrRtnExecOrderAction(&task);
-				break;
-			}
+	case ONRTNEXECORDER:
+	{
+		this->processRtnExecOrder(task);
+		break;
+	}
 
-			case ONRTNTRANSFERMONEY:
-			{
-				this->processRtnTransferMoney(&task);
-				break;
-			}
+	case ONERRRTNEXECORDERINSERT:
+	{
+		this->processErrRtnExecOrderInsert(task);
+		break;
+	}
 
-			case ONRSPQRYSYSTEMTIME:
-			{
-				this->processRspQrySystemTime(&task);
-				break;
-			}
+	case ONERRRTNEXECORDERACTION:
+	{
+		this->processErrRtnExecOrderAction(task);
+		break;
+	}
 
-			case ONRSPQRYMARGINPREFPARAM:
-			{
-				this->processRspQryMarginPrefParam(&task);
-				break;
-			}
+	case ONRTNTRANSFERMONEY:
+	{
+		this->processRtnTransferMoney(task);
+		break;
+	}
 
-			case ONRSPDSUSERCERTIFICATION:
-			{
-				this->processRspDSUserCertification(&task);
-				break;
-			}
+	case ONRSPQRYSYSTEMTIME:
+	{
+		this->processRspQrySystemTime(task);
+		break;
+	}
 
-			case ONRSPDSPROXYSUBMITINFO:
-			{
-				this->processRspDSProxySubmitInfo(&task);
-				break;
-			}
+	case ONRSPQRYMARGINPREFPARAM:
+	{
+		this->processRspQryMarginPrefParam(task);
+		break;
+	}
 
+	case ONRSPDSUSERCERTIFICATION:
+	{
+		this->processRspDSUserCertification(task);
+		break;
+	}
 
-			}
-		}
+	case ONRSPDSPROXYSUBMITINFO:
+	{
+		this->processRspDSProxySubmitInfo(task);
+		break;
+	}
 	}
-	catch (const TerminatedError&)
-    {
-    }
 };
 
 void TdApi::processFrontConnected(Task *task)
@@ -3194,6 +3211,21 @@ void TdApi::subscribePublicTopic(int nType)
 	this->api->SubscribePublicTopic((USTP_TE_RESUME_TYPE)nType);
 };
 
+void TdApi::setBatchMode(bool batch)
+{
+	this->batch_mode = batch;
+};
+
+void TdApi::setQueueCapacity(int capacity, int policy)
+{
+	this->task_queue.setCapacity(capacity, policy);
+};
+
+dict TdApi::getQueueStats()
+{
+	return toDict(this->task_queue.getStats());
+};
+
 int TdApi::reqUserLogin(const dict &req, int reqid)
 {
 	CUstpFtdcReqUserLoginField myreq = CUstpFtdcReqUserLoginField();
@@ -3243,6 +3275,43 @@ int TdApi::reqOrderInsert(const dict &req, int reqid)
 {
 	CUstpFtdcInputOrderField myreq = CUstpFtdcInputOrderField();
 	memset(&myreq, 0, sizeof(myreq));
+	this->fillInputOrder(req, myreq);
+	int i = this->api->ReqOrderInsert(&myreq, reqid);
+	return i;
+};
+
+int TdApi::createOrderTemplate(const dict &req)
+{
+	CUstpFtdcInputOrderField myreq = CUstpFtdcInputOrderField();
+	memset(&myreq, 0, sizeof(myreq));
+	this->fillInputOrder(req, myreq);
+	this->order_templates.push_back(myreq);
+	return (int)this->order_templates.size() - 1;
+};
+
+void TdApi::clearOrderTemplates()
+{
+	this->order_templates.clear();
+};
+
+int TdApi::reqOrderInsertTemplate(int template_id, double price, int volume, string localid, int reqid)
+{
+	if (template_id < 0 || template_id >= (int)this->order_templates.size())
+	{
+		return -4;
+	}
+
+	//Ԥõίģ壬ֻ޸ļ۸ͱίк
+	CUstpFtdcInputOrderField myreq = this->order_templates[template_id];
+	myreq.LimitPrice = price;
+	myreq.Volume = volume;
+	strncpy(myreq.UserOrderLocalID, localid.c_str(), sizeof(myreq.UserOrderLocalID) - 1);
+	int i = this->api->ReqOrderInsert(&myreq, reqid);
+	return i;
+};
+
+void TdApi::fillInputOrder(const dict &req, CUstpFtdcInputOrderField &myreq)
+{
 	getString(req, "BrokerID", myreq.BrokerID);
 	getString(req, "ExchangeID", myreq.ExchangeID);
 	getString(req, "OrderSysID", myreq.OrderSysID);
@@ -3270,14 +3339,19 @@ int TdApi::reqOrderInsert(const dict &req, int reqid)
 	getString(req, "ActionDay", myreq.ActionDay);
 	getChar(req, "ArbiType", &myreq.ArbiType);
 	getString(req, "ClientID", myreq.ClientID);
-	int i = this->api->ReqOrderInsert(&myreq, reqid);
-	return i;
 };
 
 int TdApi::reqOrderAction(const dict &req, int reqid)
 {
 	CUstpFtdcOrderActionField myreq = CUstpFtdcOrderActionField();
 	memset(&myreq, 0, sizeof(myreq));
+	this->fillOrderAction(req, myreq);
+	int i = this->api->ReqOrderAction(&myreq, reqid);
+	return i;
+};
+
+void TdApi::fillOrderAction(const dict &req, CUstpFtdcOrderActionField &myreq)
+{
 	getString(req, "ExchangeID", myreq.ExchangeID);
 	getString(req, "OrderSysID", myreq.OrderSysID);
 	getString(req, "BrokerID", myreq.BrokerID);
@@ -3290,8 +3364,80 @@ int TdApi::reqOrderAction(const dict &req, int reqid)
 	getInt(req, "VolumeChange", &myreq.VolumeChange);
 	getInt(req, "BusinessLocalID", &myreq.BusinessLocalID);
 	getString(req, "ClientID", myreq.ClientID);
-	int i = this->api->ReqOrderAction(&myreq, reqid);
-	return i;
+};
+
+pybind11::list TdApi::reqOrderInsertBatch(const pybind11::list &reqs, int reqid)
+{
+	//GILʱȫίУÿΪ(ģ, ۸, , ίк)
+	size_t count = reqs.size();
+	vector<CUstpFtdcInputOrderField> myreqs(count);
+	vector<int> results(count, 0);
+
+	for (size_t n = 0; n < count; n++)
+	{
+		pybind11::tuple item = reqs[n].cast<pybind11::tuple>();
+		int template_id = item[0].cast<int>();
+		if (template_id < 0 || template_id >= (int)this->order_templates.size())
+		{
+			results[n] = -4;
+			continue;
+		}
+
+		CUstpFtdcInputOrderField &myreq = myreqs[n];
+		myreq = this->order_templates[template_id];
+		myreq.LimitPrice = item[1].cast<double>();
+		myreq.Volume = item[2].cast<int>();
+		string localid = item[3].cast<string>();
+		strncpy(myreq.UserOrderLocalID, localid.c_str(), sizeof(myreq.UserOrderLocalID) - 1);
+	}
+
+	//ͷGILһԷ
+	{
+		gil_scoped_release release;
+		for (size_t n = 0; n < count; n++)
+		{
+			if (!results[n])
+			{
+				results[n] = this->api->ReqOrderInsert(&myreqs[n], reqid + (int)n);
+			}
+		}
+	}
+
+	pybind11::list data;
+	for (int result : results)
+	{
+		data.append(result);
+	}
+	return data;
+};
+
+pybind11::list TdApi::reqOrderActionBatch(const pybind11::list &reqs, int reqid)
+{
+	size_t count = reqs.size();
+	vector<CUstpFtdcOrderActionField> myreqs(count);
+	vector<int> results(count, 0);
+
+	for (size_t n = 0; n < count; n++)
+	{
+		CUstpFtdcOrderActionField &myreq = myreqs[n];
+		memset(&myreq, 0, sizeof(myreq));
+		this->fillOrderAction(reqs[n].cast<dict>(), myreq);
+	}
+
+	{
+		gil_scoped_release release;
+		for (size_t n = 0; n < count; n++)
+		{
+			results[n] = this->api->ReqOrderAction(&myreqs[n], reqid + (int)n);
+		}
+	}
+
+	pybind11::list data;
+	for (int result : results)
+	{
+		data.append(result);
+	}
+	return data;
 };
 
 int TdApi::reqQuoteInsert(const dict &req, int reqid)
@@ -4412,10 +4558,18 @@ PYBIND11_MODULE(vnfemastd, m)
 		.def("subscribePrivateTopic", &TdApi::subscribePrivateTopic)
 		.def("subscribePublicTopic", &TdApi::subscribePublicTopic)
 		.def("subscribeUserTopic", &TdApi::subscribeUserTopic)
+		.def("setBatchMode", &TdApi::setBatchMode)
+		.def("setQueueCapacity", &TdApi::setQueueCapacity)
+		.def("getQueueStats", &TdApi::getQueueStats)
 		.def("reqUserLogin", &TdApi::reqUserLogin)
 		.def("reqUserLogout", &TdApi::reqUserLogout)
 		.def("reqUserPasswordUpdate", &TdApi::reqUserPasswordUpdate)
 		.def("reqOrderInsert", &TdApi::reqOrderInsert)
+		.def("createOrderTemplate", &TdApi::createOrderTemplate)
+		.def("clearOrderTemplates", &TdApi::clearOrderTemplates)
+		.def("reqOrderInsertTemplate", &TdApi::reqOrderInsertTemplate)
+		.def("reqOrderInsertBatch", &TdApi::reqOrderInsertBatch)
+		.def("reqOrderActionBatch", &TdApi::reqOrderActionBatch)
 		.def("reqOrderAction", &TdApi::reqOrderAction)
 		.def("reqQuoteInsert", &TdApi::reqQuoteInsert)
 		.def("reqQuoteAction", &TdApi::reqQuoteAction)
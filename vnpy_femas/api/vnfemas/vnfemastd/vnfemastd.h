@@ -85,6 +85,8 @@ private:
 	thread task_thread;					//ָ߳루pythonݣ
 	TaskQueue task_queue;			    //
 	bool active = false;				//״̬
+	bool batch_mode = false;			//ģʽ
+	vector<CUstpFtdcInputOrderField> order_templates;	//Ԥõίģ
 
 public:
 	TdApi()
@@ -290,6 +292,8 @@ public:
 
 	void processTask();
 
+	void dispatchTask(Task *task);
+
 	void processFrontConnected(Task *task);
 
 	void processQryFrontConnected(Task *task);
@@ -560,6 +564,12 @@ public:
 
 	void subscribeUserTopic(int nType);
 
+	void setBatchMode(bool batch);
+
+	void setQueueCapacity(int capacity, int policy);
+
+	dict getQueueStats();
+
 	int reqUserLogin(const dict &req, int reqid);
 
 	int reqUserLogout(const dict &req, int reqid);
@@ -568,8 +578,22 @@ public:
 
 	int reqOrderInsert(const dict &req, int reqid);
 
+	int createOrderTemplate(const dict &req);
+
+	void clearOrderTemplates();
+
+	int reqOrderInsertTemplate(int template_id, double price, int volume, string localid, int reqid);
+
+	void fillInputOrder(const dict &req, CUstpFtdcInputOrderField &myreq);
+
 	int reqOrderAction(const dict &req, int reqid);
 
+	void fillOrderAction(const dict &req, CUstpFtdcOrderActionField &myreq);
+
+	pybind11::list reqOrderInsertBatch(const pybind11::list &reqs, int reqid);
+
+	pybind11::list reqOrderActionBatch(const pybind11::list &reqs, int reqid);
+
 	int reqQuoteInsert(const dict &req, int reqid);
 
 	int reqQuoteAction(const dict &req, int reqid);
@@ -0,0 +1,233 @@
+"""
+飞马接口的asyncio封装。
+
+委托回报、成交、资金、持仓和行情通过直连回调在底层回调线程中获取，不经过EventEngine。
+回调线程只把数据追加到待处理列表，首次追加时调用一次call_soon_threadsafe唤醒事件循环，
+事件循环被唤醒后一次处理列表中积累的所有数据，行情密集时大量回调只需唤醒一次。
+行情和成交的异步队列长度有上限，使用方处理不及时导致队列已满时丢弃最早的数据并计数。
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from vnpy.trader.object import (
+    AccountData,
+    OrderData,
+    OrderRequest,
+    PositionData,
+    TickData,
+    TradeData
+)
+
+if TYPE_CHECKING:
+    from .femas_gateway import FemasGateway
+
+
+class AsyncFemasGateway:
+    """飞马接口的asyncio封装，需在事件循环中创建"""
+
+    def __init__(self, gateway: "FemasGateway", loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """构造函数"""
+        self.gateway: FemasGateway = gateway
+        self.loop: asyncio.AbstractEventLoop = loop or asyncio.get_running_loop()
+
+        # 回调线程和事件循环之间交换数据的待处理列表
+        self.lock: Lock = Lock()
+        self.pending: list[tuple[Callable, object]] = []
+        self.scheduled: bool = False
+
+        self.order_futures: dict[str, asyncio.Future] = {}
+        self.account_futures: list[asyncio.Future] = []
+        self.position_futures: list[asyncio.Future] = []
+
+        # 行情和成交异步队列的最大长度，以及队列已满时丢弃的数据数量
+        self.queue_size: int = 10000
+        self.dropped_count: int = 0
+
+        self.tick_queues: dict[str, list[asyncio.Queue]] = {}
+        self.trade_queues: list[asyncio.Queue] = []
+
+        self.td_callbacks: list[tuple[str, Callable]] = [
+            ("order", self.on_order),
+            ("trade", self.on_trade),
+            ("account", self.on_account),
+            ("position", self.on_position),
+        ]
+        for name, callback in self.td_callbacks:
+            self.gateway.td_api.add_callback(name, callback)
+
+    def close(self) -> None:
+        """注销所有直连回调"""
+        for name, callback in self.td_callbacks:
+            self.gateway.td_api.remove_callback(name, callback)
+
+        for symbol in list(self.tick_queues):
+            self.gateway.unregister_tick_callback(symbol, self.on_tick)
+        self.tick_queues.clear()
+
+    async def send_order(self, req: OrderRequest, timeout: float | None = None) -> OrderData | None:
+        """委托下单，收到柜台的第一笔委托回报后返回该委托，委托请求无效时返回None"""
+        vt_orderid: str = self.gateway.send_order(req)
+        if not vt_orderid:
+            return None
+
+        # 回报只会在事件循环中处理，因此在此之前注册不会错过
+        orderid: str = vt_orderid.rsplit(".", 1)[1]
+        future: asyncio.Future = self.loop.create_future()
+        self.order_futures[orderid] = future
+
+        try:
+            order: OrderData = await asyncio.wait_for(future, timeout)
+        finally:
+            self.order_futures.pop(orderid, None)
+
+        return order
+
+    async def query_account(self, timeout: float | None = None) -> AccountData:
+        """查询资金，返回下一笔资金查询回报，尚未登录时抛出RuntimeError"""
+        future: asyncio.Future = self.loop.create_future()
+        self.account_futures.append(future)
+
+        # 查询请求未发出时不会有回报，直接报错而不是一直等待
+        if not self.gateway.td_api.query_account():
+            self.account_futures.remove(future)
+            raise RuntimeError("资金查询失败，尚未获取投资者代码")
+
+        try:
+            account: AccountData = await asyncio.wait_for(future, timeout)
+        finally:
+            if future in self.account_futures:
+                self.account_futures.remove(future)
+
+        return account
+
+    async def query_position(self, timeout: float | None = None) -> list[PositionData]:
+        """查询持仓，返回下一次持仓查询完成并校准后的持仓列表，尚未获取合约信息时抛出RuntimeError"""
+        future: asyncio.Future = self.loop.create_future()
+        self.position_futures.append(future)
+
+        if not self.gateway.td_api.query_position():
+            self.position_futures.remove(future)
+            raise RuntimeError("持仓查询失败，尚未获取合约信息")
+
+        try:
+            positions: list[PositionData] = await asyncio.wait_for(future, timeout)
+        finally:
+            if future in self.position_futures:
+                self.position_futures.remove(future)
+
+        return positions
+
+    async def ticks(self, symbol: str) -> AsyncIterator[TickData]:
+        """逐笔获取合约行情的异步迭代器，合约需已订阅"""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        queues: list[asyncio.Queue] = self.tick_queues.setdefault(symbol, [])
+        if not queues:
+            publish: bool = symbol not in self.gateway.unpublished
+            self.gateway.register_tick_callback(symbol, self.on_tick, publish)
+        queues.append(queue)
+
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            queues.remove(queue)
+            if not queues:
+                self.tick_queues.pop(symbol, None)
+                self.gateway.unregister_tick_callback(symbol, self.on_tick)
+
+    async def trades(self) -> AsyncIterator[TradeData]:
+        """逐笔获取成交的异步迭代器"""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self.trade_queues.append(queue)
+
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.trade_queues.remove(queue)
+
+    def post(self, func: Callable, data: object) -> None:
+        """在回调线程中调用，将数据交给事件循环处理"""
+        with self.lock:
+            self.pending.append((func, data))
+            if self.scheduled:
+                return
+            self.scheduled = True
+
+        self.loop.call_soon_threadsafe(self.process_pending)
+
+    def process_pending(self) -> None:
+        """在事件循环中一次处理所有待处理数据"""
+        with self.lock:
+            pending: list[tuple[Callable, object]] = self.pending
+            self.pending = []
+            self.scheduled = False
+
+        for func, data in pending:
+            func(data)
+
+    def on_tick(self, tick: TickData) -> None:
+        """行情直连回调"""
+        self.post(self.put_tick, tick)
+
+    def on_order(self, order: OrderData) -> None:
+        """委托直连回调"""
+        self.post(self.set_order, order)
+
+    def on_trade(self, trade: TradeData) -> None:
+        """成交直连回调"""
+        self.post(self.put_trade, trade)
+
+    def on_account(self, account: AccountData) -> None:
+        """资金直连回调"""
+        self.post(self.set_account, account)
+
+    def on_position(self, positions: list[PositionData]) -> None:
+        """持仓直连回调"""
+        self.post(self.set_positions, positions)
+
+    def put_tick(self, tick: TickData) -> None:
+        """分发行情到异步迭代器"""
+        for queue in self.tick_queues.get(tick.symbol, []):
+            self.put_queue(queue, tick)
+
+    def put_trade(self, trade: TradeData) -> None:
+        """分发成交到异步迭代器"""
+        for queue in self.trade_queues:
+            self.put_queue(queue, trade)
+
+    def put_queue(self, queue: asyncio.Queue, data: object) -> None:
+        """放入异步队列，队列已满时丢弃最早的一条数据"""
+        if queue.full():
+            queue.get_nowait()
+            self.dropped_count += 1
+
+        queue.put_nowait(data)
+
+    def set_order(self, order: OrderData) -> None:
+        """完成等待该委托回报的下单请求"""
+        future: asyncio.Future | None = self.order_futures.pop(order.orderid, None)
+        if future and not future.done():
+            future.set_result(order)
+
+    def set_account(self, account: AccountData) -> None:
+        """完成所有等待中的资金查询"""
+        futures: list[asyncio.Future] = self.account_futures
+        self.account_futures = []
+
+        for future in futures:
+            if not future.done():
+                future.set_result(account)
+
+    def set_positions(self, positions: list[PositionData]) -> None:
+        """完成所有等待中的持仓查询"""
+        futures: list[asyncio.Future] = self.position_futures
+        self.position_futures = []
+
+        for future in futures:
+            if not future.done():
+                future.set_result(positions)
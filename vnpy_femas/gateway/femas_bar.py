@@ -0,0 +1,249 @@
+"""
+飞马接口行情K线合成。
+
+在行情接口中按合约增量合成秒级和分钟级K线，每条行情只需更新各周期当前K线的高低收价格和成交量，
+同一路行情只合成一次，所有策略进程共享结果，无需各自重复合成。
+
+成交量和成交额由累计值的差值计算，交易日切换时重新开始累计。品种所在交易时段的结束时刻（如11:30:00、15:00:00）
+的收盘行情归入前一根K线，结束时刻按交易所和品种区分，仍在交易的品种不受其他品种收盘时刻影响。
+
+K线按行情发生的自然时间（ActionDay和UpdateTime）划分时间窗口，夜盘和日盘虽属同一交易日，时间仍按先后递增。
+行情中断时由定时器推送超时未完成的K线。超时以最近一笔行情的交易所时间加上此后经过的本地时间判断，
+本地时钟和交易所时钟的偏差不会导致K线提前结束。只有所属时间窗口的K线已经推送后才到达的行情视为延迟行情。
+"""
+
+import re
+from collections.abc import Callable
+from datetime import datetime, time
+from threading import Lock
+from time import monotonic
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+
+# K线推送事件，后接合约代码时只推送该合约的K线
+EVENT_BAR_SECOND: str = "eBarSecond."
+EVENT_BAR_MINUTE: str = "eBarMinute."
+
+# 合成的K线周期（秒）和对应的推送事件
+BAR_EVENTS: dict[int, str] = {
+    1: EVENT_BAR_SECOND,
+    60: EVENT_BAR_MINUTE,
+}
+
+# 各交易所日盘交易时段的结束时刻，该时刻的行情归入前一根K线
+DAY_SESSION_ENDS: dict[Exchange, frozenset[time]] = {
+    Exchange.SHFE: frozenset({time(10, 15), time(11, 30), time(15, 0)}),
+    Exchange.INE: frozenset({time(10, 15), time(11, 30), time(15, 0)}),
+    Exchange.DCE: frozenset({time(10, 15), time(11, 30), time(15, 0)}),
+    Exchange.CZCE: frozenset({time(10, 15), time(11, 30), time(15, 0)}),
+    Exchange.GFEX: frozenset({time(10, 15), time(11, 30), time(15, 0)}),
+    Exchange.CFFEX: frozenset({time(11, 30), time(15, 0)}),
+}
+
+# 日盘结束时刻和所在交易所不同的品种
+PRODUCT_DAY_SESSION_ENDS: dict[str, frozenset[time]] = {
+    "T": frozenset({time(11, 30), time(15, 15)}),
+    "TF": frozenset({time(11, 30), time(15, 15)}),
+    "TS": frozenset({time(11, 30), time(15, 15)}),
+    "TL": frozenset({time(11, 30), time(15, 15)}),
+}
+
+# 有夜盘的交易所，夜盘默认23:00结束
+NIGHT_SESSION_EXCHANGES: set[Exchange] = {Exchange.SHFE, Exchange.INE, Exchange.DCE, Exchange.CZCE}
+NIGHT_SESSION_END: time = time(23, 0)
+
+# 夜盘结束时刻不是23:00的品种
+PRODUCT_NIGHT_SESSION_ENDS: dict[str, time] = {
+    "cu": time(1, 0),
+    "bc": time(1, 0),
+    "al": time(1, 0),
+    "ao": time(1, 0),
+    "zn": time(1, 0),
+    "pb": time(1, 0),
+    "ni": time(1, 0),
+    "sn": time(1, 0),
+    "ss": time(1, 0),
+    "au": time(2, 30),
+    "ag": time(2, 30),
+    "sc": time(2, 30),
+}
+
+PRODUCT_PATTERN: re.Pattern = re.compile(r"[A-Za-z]+")
+
+
+class SymbolBars:
+    """单个合约的K线合成状态"""
+
+    def __init__(self, count: int, session_ends: frozenset[time]) -> None:
+        """构造函数，count为K线周期数量，session_ends为合约交易时段的结束时刻"""
+        self.session_ends: frozenset[time] = session_ends
+
+        self.trading_day: str = ""
+        self.last_volume: float = 0
+        self.last_turnover: float = 0
+
+        # 各周期当前K线的时间窗口编号和K线数据
+        self.buckets: list[int] = [0] * count
+        self.bars: list[BarData | None] = [None] * count
+
+        # 各周期最近一根已推送K线的时间窗口编号
+        self.pushed: list[int] = [-1] * count
+
+
+class BarAggregator:
+    """多合约多周期K线合成器"""
+
+    def __init__(
+        self,
+        callback: Callable[[BarData, int], None],
+        windows: tuple[int, ...] = (1, 60),
+        grace: float = 3,
+        gateway_name: str = ""
+    ) -> None:
+        """构造函数，windows为K线周期（秒），grace为定时推送K线前等待延迟行情的秒数"""
+        self.callback: Callable[[BarData, int], None] = callback
+        self.windows: tuple[int, ...] = windows
+        self.grace: float = grace
+        self.gateway_name: str = gateway_name
+
+        # 行情回调线程更新K线，定时器线程推送超时K线
+        self.lock: Lock = Lock()
+        self.states: dict[str, SymbolBars] = {}
+
+        # 最近一笔行情的交易所时间戳和收到时的本地单调时钟，用于判断K线是否超时
+        self.exchange_time: float = 0
+        self.arrival_time: float = 0
+
+        # 所属时间窗口的K线已推送后才到达的行情数量
+        self.late_count: int = 0
+
+    def update(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        dt: datetime,
+        trading_day: str,
+        price: float,
+        volume: float,
+        turnover: float,
+        open_interest: float
+    ) -> None:
+        """使用一笔行情更新该合约各周期的K线，dt为按ActionDay解析的行情时间"""
+        completed: list[tuple[BarData, int]] = []
+
+        with self.lock:
+            state: SymbolBars | None = self.states.get(symbol, None)
+            if not state:
+                state = SymbolBars(len(self.windows), get_session_ends(symbol, exchange))
+                self.states[symbol] = state
+
+            self.exchange_time = dt.timestamp()
+            self.arrival_time = monotonic()
+
+            # 启动后的第一笔行情只作为累计值基准，交易日切换后累计值从零开始
+            if state.trading_day != trading_day:
+                if state.trading_day:
+                    self.complete_all(state, completed)
+                    state.last_volume = 0
+                    state.last_turnover = 0
+                else:
+                    state.last_volume = volume
+                    state.last_turnover = turnover
+                state.trading_day = trading_day
+
+            volume_change: float = max(volume - state.last_volume, 0)
+            turnover_change: float = max(turnover - state.last_turnover, 0)
+            state.last_volume = volume
+            state.last_turnover = turnover
+
+            if price > 0:
+                timestamp: int = int(dt.timestamp())
+                closing: bool = dt.second == 0 and dt.time().replace(microsecond=0) in state.session_ends
+
+                for i, window in enumerate(self.windows):
+                    bucket: int = timestamp // window
+                    bar: BarData | None = state.bars[i]
+
+                    # 交易时段结束时刻的收盘行情并入前一根K线
+                    if closing and bucket == state.buckets[i] + 1:
+                        bucket = state.buckets[i]
+
+                    # 该时间窗口的K线已经推送，或早于当前K线的乱序行情不再处理，只计数
+                    if bucket == state.pushed[i] or bucket < state.buckets[i]:
+                        self.late_count += 1
+                        continue
+
+                    if bar and bucket != state.buckets[i]:
+                        completed.append((bar, window))
+                        state.pushed[i] = state.buckets[i]
+                        bar = None
+
+                    if not bar:
+                        bar = BarData(
+                            symbol=symbol,
+                            exchange=exchange,
+                            datetime=datetime.fromtimestamp(bucket * window, dt.tzinfo),
+                            interval=Interval.MINUTE if window == 60 else None,
+                            open_price=price,
+                            high_price=price,
+                            low_price=price,
+                            gateway_name=self.gateway_name,
+                        )
+                        state.bars[i] = bar
+                        state.buckets[i] = bucket
+
+                    bar.high_price = max(bar.high_price, price)
+                    bar.low_price = min(bar.low_price, price)
+                    bar.close_price = price
+                    bar.volume += volume_change
+                    bar.turnover += turnover_change
+                    bar.open_interest = open_interest
+
+        for bar, window in completed:
+            self.callback(bar, window)
+
+    def flush(self) -> None:
+        """推送时间窗口已结束超过等待时间的K线，用于午休、收盘等行情中断的情况"""
+        completed: list[tuple[BarData, int]] = []
+
+        with self.lock:
+            if not self.arrival_time:
+                return
+
+            # 以交易所时间为准，本地时钟只用于计算收到最近一笔行情后经过的时间
+            timestamp: float = self.exchange_time + (monotonic() - self.arrival_time) - self.grace
+
+            for state in self.states.values():
+                for i, window in enumerate(self.windows):
+                    bar: BarData | None = state.bars[i]
+                    if bar and (state.buckets[i] + 1) * window <= timestamp:
+                        completed.append((bar, window))
+                        state.bars[i] = None
+                        state.pushed[i] = state.buckets[i]
+
+        for bar, window in completed:
+            self.callback(bar, window)
+
+    def complete_all(self, state: SymbolBars, completed: list[tuple[BarData, int]]) -> None:
+        """结束合约所有周期的当前K线"""
+        for i, window in enumerate(self.windows):
+            bar: BarData | None = state.bars[i]
+            if bar:
+                completed.append((bar, window))
+                state.bars[i] = None
+                state.pushed[i] = state.buckets[i]
+
+
+def get_session_ends(symbol: str, exchange: Exchange) -> frozenset[time]:
+    """获取合约所属品种交易时段的结束时刻"""
+    match: re.Match | None = PRODUCT_PATTERN.match(symbol)
+    product: str = match.group() if match else ""
+
+    ends: frozenset[time] = PRODUCT_DAY_SESSION_ENDS.get(product, DAY_SESSION_ENDS.get(exchange, frozenset()))
+
+    if exchange in NIGHT_SESSION_EXCHANGES:
+        ends |= {PRODUCT_NIGHT_SESSION_ENDS.get(product, NIGHT_SESSION_END)}
+
+    return ends
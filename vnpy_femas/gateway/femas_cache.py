@@ -0,0 +1,49 @@
+"""
+飞马接口合约信息的本地缓存。
+
+合约信息按交易日保存为pickle文件，交易接口登录后按柜台返回的交易日加载缓存并推送，
+无需等待柜台合约查询完成即可处理行情和委托，柜台查询结果到达后再刷新缓存。
+交易日只以柜台登录回报为准，不由本地时钟推算，避免节假日或本地时钟偏差时加载过期缓存。
+"""
+
+import pickle
+from pathlib import Path
+
+from vnpy.trader.object import ContractData
+
+
+CACHE_VERSION: int = 1
+
+
+class ContractCache:
+    """合约信息缓存文件"""
+
+    def __init__(self, path: str | Path) -> None:
+        """构造函数"""
+        self.path: Path = Path(path)
+
+    def load(self, trading_day: str) -> list[ContractData]:
+        """加载指定交易日的合约信息，缓存不存在、交易日不一致或损坏时返回空列表"""
+        if not self.path.exists():
+            return []
+
+        try:
+            with open(self.path, "rb") as f:
+                version, day, contracts = pickle.load(f)
+        except Exception:
+            return []
+
+        if version != CACHE_VERSION or day != trading_day:
+            return []
+
+        result: list[ContractData] = contracts
+        return result
+
+    def save(self, trading_day: str, contracts: list[ContractData]) -> None:
+        """保存合约信息，先写入临时文件再替换，避免读到写了一半的缓存"""
+        temp_path: Path = self.path.with_suffix(".tmp")
+
+        with open(temp_path, "wb") as f:
+            pickle.dump((CACHE_VERSION, trading_day, contracts), f, pickle.HIGHEST_PROTOCOL)
+
+        temp_path.replace(self.path)
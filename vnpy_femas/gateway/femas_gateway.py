@@ -1,6 +1,9 @@
-from datetime import datetime
-from time import sleep
+from collections.abc import Callable
+from copy import copy
+from datetime import datetime, timedelta
 from pathlib import Path
+from threading import Lock
+from time import perf_counter_ns, time_ns
 
 from vnpy.event import EventEngine, Event
 from vnpy.trader.constant import (
@@ -15,6 +18,7 @@ from vnpy.trader.constant import (
 from vnpy.trader.gateway import BaseGateway
 from vnpy.trader.object import (
     AccountData,
+    BarData,
     CancelRequest,
     ContractData,
     OrderData,
@@ -30,6 +34,7 @@ from vnpy.trader.event import EVENT_TIMER
 from ..api import (
     MdApi,
     TdApi,
+    NATIVE_AVAILABLE,
     USTP_FTDC_AF_Delete,
     USTP_FTDC_CAS_Accepted,
     USTP_FTDC_CAS_Rejected,
@@ -55,6 +60,17 @@ from ..api import (
     USTP_FTDC_VC_AV,
     USTP_FTDC_VC_CV
 )
+from .femas_replay import CallbackRecorder
+from .femas_bar import BAR_EVENTS, BarAggregator
+from .femas_cache import ContractCache
+from .femas_latency import LatencyHistogram, OrderLatencyTracker, summarize_histogram
+from .femas_snapshot import TickSnapshotWriter
+from .femas_store import TickStore
+from .femas_scheduler import (
+    PRIORITY_POLL,
+    PRIORITY_SETUP,
+    RequestScheduler
+)
 
 
 # 委托状态映射
@@ -85,8 +101,8 @@ ORDERTYPE_VT2FEMAS: dict[OrderType, str] = {
 OFFSET_VT2FEMAS: dict[Offset, str] = {
     Offset.OPEN: USTP_FTDC_OF_Open,
     Offset.CLOSE: USTP_FTDC_OF_Close,
-    Offset.CLOSETODAY: USTP_FTDC_OF_CloseYesterday,
-    Offset.CLOSEYESTERDAY: USTP_FTDC_OF_CloseToday,
+    Offset.CLOSETODAY: USTP_FTDC_OF_CloseToday,
+    Offset.CLOSEYESTERDAY: USTP_FTDC_OF_CloseYesterday,
 }
 OFFSET_FEMAS2VT: dict[str, Offset] = {v: k for k, v in OFFSET_VT2FEMAS.items()}
 
@@ -105,12 +121,110 @@ OPTIONTYPE_FEMAS2VT: dict[str, OptionType] = {
     USTP_FTDC_OT_PutOptions: OptionType.PUT,
 }
 
+# 回调队列溢出策略
+QUEUE_OVERFLOW_BLOCK: int = 0       # 阻塞底层回调线程，直到队列出现空位
+QUEUE_OVERFLOW_DROP: int = 1        # 丢弃最早的行情数据（委托成交回报不会被丢弃）
+QUEUE_OVERFLOW_LOG: int = 2         # 照常入队，仅记录溢出次数并输出日志
+
 # 其他常量
 CHINA_TZ = ZoneInfo("Asia/Shanghai")       # 中国时区
+MILLISEC_DELTAS: tuple[timedelta, ...] = tuple(
+    timedelta(milliseconds=i * 100) for i in range(10)
+)                                           # 行情时间戳精度为100毫秒
 
 # 合约数据全局缓存字典
 symbol_contract_map: dict[str, ContractData] = {}
 
+# 批量合约推送事件，数据为ContractData列表
+EVENT_CONTRACT_BATCH: str = "eContractBatch"
+
+# 批量合约推送事件中每个事件的最大合约数量
+CONTRACT_CHUNK_SIZE: int = 1000
+
+# 批量订阅时每次调用底层函数的最大合约数量
+SUBSCRIBE_CHUNK_SIZE: int = 500
+
+# 共享行情模式下，按行情服务器地址复用的行情接口
+shared_md_apis: dict[str, "FemasMdApi"] = {}
+
+
+class TimestampDecoder:
+    """
+    飞马时间戳解析器，缓存日期和秒级解析结果，毫秒部分通过加法计算。
+    """
+
+    cache_size: int = 100_000
+
+    def __init__(self) -> None:
+        """构造函数"""
+        self.date_cache: dict[str, datetime] = {}
+        self.second_cache: dict[str, datetime] = {}
+
+    def decode(self, date: str, time: str, millisec: int = 0) -> datetime:
+        """解析日期（%Y%m%d）、时间（%H:%M:%S）和毫秒，返回带时区的datetime"""
+        key: str = date + time
+        dt: datetime | None = self.second_cache.get(key, None)
+
+        if dt is None:
+            day: datetime | None = self.date_cache.get(date, None)
+            if day is None:
+                day = datetime.strptime(date, "%Y%m%d").replace(tzinfo=CHINA_TZ)
+                self.date_cache[date] = day
+
+            hour, minute, second = time.split(":")
+            dt = day.replace(hour=int(hour), minute=int(minute), second=int(second))
+
+            if len(self.second_cache) >= self.cache_size:
+                self.second_cache.clear()
+            self.second_cache[key] = dt
+
+        if not millisec:
+            return dt
+
+        # 正常毫秒数按100毫秒截断，异常值保持和原有strptime逻辑一致
+        if 0 < millisec < 1000:
+            return dt + MILLISEC_DELTAS[millisec // 100]
+
+        timestamp: str = f"{date} {time}.{int(millisec / 100)}"
+        return datetime.strptime(timestamp, "%Y%m%d %H:%M:%S.%f").replace(tzinfo=CHINA_TZ)
+
+
+class TradeIdFilter:
+    """
+    成交编号去重过滤器。
+
+    交易日切换时自动清空，纯数字编号以整数保存以节省内存，
+    数量超出容量时淘汰最早加入的编号。
+    """
+
+    def __init__(self, capacity: int = 200_000) -> None:
+        """构造函数"""
+        self.capacity: int = capacity
+        self.trading_day: str = ""
+        self.tradeids: dict[int | str, None] = {}
+
+    def add(self, tradeid: str, trading_day: str) -> bool:
+        """加入成交编号，编号已存在时返回False"""
+        if trading_day != self.trading_day:
+            self.tradeids.clear()
+            self.trading_day = trading_day
+
+        text: str = tradeid.strip()
+        key: int | str = int(text) if text.isdigit() else text
+
+        if key in self.tradeids:
+            return False
+        self.tradeids[key] = None
+
+        if len(self.tradeids) > self.capacity:
+            del self.tradeids[next(iter(self.tradeids))]
+
+        return True
+
+    def __len__(self) -> int:
+        """已保存的成交编号数量"""
+        return len(self.tradeids)
+
 
 class FemasGateway(BaseGateway):
     """
@@ -138,10 +252,32 @@ class FemasGateway(BaseGateway):
         self.td_api: FemasTdApi = FemasTdApi(self)
         self.md_api: FemasMdApi = FemasMdApi(self)
 
-        self.count: int = 0
+        # 持仓和资金由回报实时维护，定时查询仅用于校准，查询间隔单位为秒
+        self.position_interval: int = 30
+        self.position_count: int = 0
+        self.account_interval: int = 4
+        self.account_count: int = 0
+
+        self.recorder: CallbackRecorder | None = None
+
+        # 共享行情模式下，同一进程内连接相同行情服务器的多个接口共用一个行情连接
+        self.shared_md: bool = False
+
+        # 直连行情回调，在底层回调线程中同步调用，可按合约关闭EventEngine推送
+        # 注册和注销时整体替换元组，回调线程遍历期间不受其他线程修改影响
+        self.tick_callbacks: dict[str, tuple[Callable[[TickData], None], ...]] = {}
+        self.unpublished: set[str] = set()
+
+        # 委托往返延时定时输出日志的间隔，单位为秒，0为不输出
+        self.order_latency_interval: int = 0
+        self.order_latency_count: int = 0
 
     def connect(self, setting: dict) -> None:
         """连接交易接口"""
+        if not NATIVE_AVAILABLE:
+            self.write_log("飞马底层接口库加载失败，无法连接柜台")
+            return
+
         userid: str = setting["用户名"]
         password: str = setting["密码"]
         brokerid: str = setting["经纪商代码"]
@@ -157,13 +293,30 @@ class FemasGateway(BaseGateway):
         auth_code: str = setting["授权编码"]
 
         self.td_api.connect(td_address, userid, password, brokerid, auth_code, appid)
-        self.md_api.connect(md_address, userid, password, brokerid)
+
+        if self.shared_md:
+            self.md_api = self.get_shared_md_api(md_address)
+
+        if not self.md_api.connect_status:
+            self.md_api.connect(md_address, userid, password, brokerid)
 
         self.init_query()
 
     def subscribe(self, req: SubscribeRequest) -> None:
         """订阅行情"""
-        self.md_api.subscribe(req)
+        self.md_api.subscribe(req, self)
+
+    def unsubscribe(self, req: SubscribeRequest) -> None:
+        """退订行情"""
+        self.md_api.unsubscribe(req, self)
+
+    def subscribe_batch(self, reqs: list[SubscribeRequest]) -> None:
+        """批量订阅行情"""
+        self.md_api.subscribe_batch(reqs, self)
+
+    def unsubscribe_batch(self, reqs: list[SubscribeRequest]) -> None:
+        """批量退订行情"""
+        self.md_api.unsubscribe_batch(reqs, self)
 
     def send_order(self, req: OrderRequest) -> str:
         """委托下单"""
@@ -173,6 +326,14 @@ class FemasGateway(BaseGateway):
         """委托撤单"""
         self.td_api.cancel_order(req)
 
+    def send_orders(self, reqs: list[OrderRequest]) -> list[str]:
+        """批量委托下单"""
+        return self.td_api.send_orders(reqs)
+
+    def cancel_orders(self, reqs: list[CancelRequest]) -> None:
+        """批量委托撤单"""
+        self.td_api.cancel_orders(reqs)
+
     def query_account(self) -> None:
         """查询资金"""
         self.td_api.query_account()
@@ -183,9 +344,128 @@ class FemasGateway(BaseGateway):
 
     def close(self) -> None:
         """关闭接口"""
+        self.stop_recording()
+
         self.td_api.close()
+
+        # 共享行情连接只在最后一个使用者关闭时断开
+        if self.md_api.remove_gateway(self):
+            return
+
+        for address, md_api in list(shared_md_apis.items()):
+            if md_api is self.md_api:
+                shared_md_apis.pop(address)
+
         self.md_api.close()
 
+    def register_tick_callback(
+        self,
+        symbol: str,
+        callback: Callable[[TickData], None],
+        publish: bool = True
+    ) -> None:
+        """注册合约的直连行情回调，publish为False时该合约行情不再推送到EventEngine"""
+        callbacks: tuple[Callable[[TickData], None], ...] = self.tick_callbacks.get(symbol, ())
+        if callback not in callbacks:
+            self.tick_callbacks[symbol] = callbacks + (callback,)
+
+        if publish:
+            self.unpublished.discard(symbol)
+        else:
+            self.unpublished.add(symbol)
+
+    def unregister_tick_callback(self, symbol: str, callback: Callable[[TickData], None]) -> None:
+        """注销合约的直连行情回调，该合约没有回调后恢复EventEngine推送"""
+        callbacks: tuple[Callable[[TickData], None], ...] = self.tick_callbacks.get(symbol, ())
+        if callback not in callbacks:
+            return
+
+        callbacks = tuple(c for c in callbacks if c != callback)
+        if callbacks:
+            self.tick_callbacks[symbol] = callbacks
+        else:
+            self.tick_callbacks.pop(symbol)
+            self.unpublished.discard(symbol)
+
+    def process_tick(self, tick: TickData, publish: bool = True) -> None:
+        """调用直连行情回调，并推送行情到EventEngine"""
+        if self.tick_callbacks:
+            for callback in self.tick_callbacks.get(tick.symbol, ()):
+                try:
+                    callback(tick)
+                except Exception as e:
+                    self.write_log(f"直连行情回调{tick.symbol}触发异常：{e!r}")
+
+            if tick.symbol in self.unpublished:
+                return
+
+        if publish:
+            self.on_tick(tick)
+
+    def set_latency_mode(self, latency: bool) -> None:
+        """开启或关闭行情延时统计"""
+        self.md_api.set_latency_mode(latency)
+
+    def get_latency_stats(self) -> dict[str, dict]:
+        """查询行情各处理阶段的延时统计"""
+        return self.md_api.get_latency_stats()
+
+    def reset_latency_stats(self) -> None:
+        """清空行情延时统计"""
+        self.md_api.reset_latency_stats()
+
+    def get_order_latency_stats(self) -> dict[str, dict[str, dict[str, dict]]]:
+        """查询委托、成交和撤单的往返延时统计，按交易所和合约分别计算"""
+        return self.td_api.latency_tracker.get_stats()
+
+    def reset_order_latency_stats(self) -> None:
+        """清空委托往返延时统计"""
+        self.td_api.latency_tracker.reset()
+
+    def write_order_latency(self) -> None:
+        """按交易所输出委托往返延时日志"""
+        stats: dict[str, dict[str, dict[str, dict]]] = self.get_order_latency_stats()
+
+        for stage, name in (("ack", "委托回报"), ("fill", "成交回报"), ("cancel", "撤单确认")):
+            for exchange, data in stats.get(stage, {}).get("exchange", {}).items():
+                msg: str = (
+                    f"{exchange}{name}延时，样本{data['count']}笔，"
+                    f"p50：{data['p50_ns'] / 1000:.0f}微秒，"
+                    f"p99：{data['p99_ns'] / 1000:.0f}微秒，"
+                    f"最大：{data['max_ns'] / 1000:.0f}微秒"
+                )
+                self.write_log(msg)
+
+    def get_shared_md_api(self, address: str) -> "FemasMdApi":
+        """获取指定行情服务器的共享行情接口，不存在时使用本接口的行情接口创建"""
+        md_api: FemasMdApi | None = shared_md_apis.get(address, None)
+
+        if not md_api:
+            md_api = self.md_api
+            md_api.shared = True
+            shared_md_apis[address] = md_api
+
+        md_api.add_gateway(self)
+        return md_api
+
+    def start_recording(self, path: str) -> None:
+        """开始录制底层回调数据到文件"""
+        if self.recorder:
+            return
+
+        self.recorder = CallbackRecorder(path)
+        self.recorder.start({"md": self.md_api, "td": self.td_api})
+        self.write_log(f"开始录制回调数据：{path}")
+
+    def stop_recording(self) -> None:
+        """停止录制底层回调数据"""
+        if not self.recorder:
+            return
+
+        self.recorder.stop()
+        self.write_log(f"停止录制回调数据，共{self.recorder.count}条")
+        self.recorder = None
+
     def write_error(self, msg: str, error: dict) -> None:
         """输出错误信息日志"""
         error_id: str = error["ErrorID"]
@@ -193,21 +473,63 @@ class FemasGateway(BaseGateway):
         msg = f"{msg}，代码：{error_id}，信息：{error_msg}"
         self.write_log(msg)
 
+    def get_queue_stats(self) -> dict[str, dict]:
+        """查询底层回调队列的长度、最大长度和最早任务等待时间"""
+        return {
+            "md": self.md_api.get_queue_stats(),
+            "td": self.td_api.get_queue_stats(),
+        }
+
+    def get_suppressed_counts(self) -> dict[str, int]:
+        """查询因数据没有变化而未推送的委托、持仓和资金次数"""
+        return self.td_api.get_suppressed_counts()
+
+    def check_queue_overflow(self) -> None:
+        """检查回调队列溢出，有新增溢出时输出日志"""
+        apis: list[tuple[str, FemasMdApi | FemasTdApi]] = [("行情", self.md_api), ("交易", self.td_api)]
+        for name, api in apis:
+            if not api.queue_capacity:
+                continue
+
+            stats: dict = api.get_queue_stats()
+            overflow: int = stats["overflow"]
+            if overflow <= api.queue_overflow:
+                continue
+
+            msg: str = (
+                f"{name}回调队列溢出{overflow - api.queue_overflow}次，"
+                f"当前长度{stats['depth']}，最大长度{stats['high_water']}，"
+                f"最早任务等待{stats['oldest_age']:.3f}秒，累计丢弃{stats['dropped']}条"
+            )
+            self.write_log(msg)
+
+            api.queue_overflow = overflow
+
     def process_timer_event(self, event: Event) -> None:
         """定时事件处理"""
-        self.count += 1
-        if self.count < 2:
-            return
-        self.count = 0
+        self.check_queue_overflow()
+        self.md_api.flush_bars()
+
+        self.account_count += 1
+        if self.account_count >= self.account_interval:
+            self.account_count = 0
+            self.query_account()
 
-        func = self.query_functions.pop(0)
-        func()
-        self.query_functions.append(func)
+        self.position_count += 1
+        if self.position_count >= self.position_interval:
+            self.position_count = 0
+            self.query_position()
+
+        if self.order_latency_interval:
+            self.order_latency_count += 1
+            if self.order_latency_count >= self.order_latency_interval:
+                self.order_latency_count = 0
+                self.write_order_latency()
 
     def init_query(self) -> None:
         """初始化查询任务"""
-        self.count = 0
-        self.query_functions: list = [self.query_account, self.query_position]
+        self.position_count = self.position_interval
+        self.account_count = self.account_interval
         self.event_engine.register(EVENT_TIMER, self.process_timer_event)
 
 
@@ -230,10 +552,53 @@ class FemasMdApi(MdApi):
 
         self.subscribed: set = set()
 
+        # 共享模式下记录使用该连接的接口和各合约的订阅者，行情按EventEngine去重后分发
+        self.shared: bool = False
+        self.gateways: list[FemasGateway] = [gateway]
+        self.subscribers: dict[str, list[FemasGateway]] = {}
+        self.tick_targets: dict[str, list[tuple[FemasGateway, bool]]] = {}
+
         self.userid: str = ""
         self.password: str = ""
         self.brokerid: str = ""
 
+        self.decoder: TimestampDecoder = TimestampDecoder()
+
+        # 精简行情模式下，底层直接推送结构体对象而非完整字典，对象支持按键名读取、get和keys，默认关闭
+        self.compact_mode: bool = False
+
+        # 合并模式下，Python处理不及时时同一合约只保留最新一笔行情
+        self.conflate_mode: bool = False
+
+        # 批量模式下，底层一次取出所有待处理回调并只获取一次GIL，行情可进一步合并为列表推送
+        self.batch_mode: bool = False
+        self.tick_batch_mode: bool = False
+
+        # 回调队列容量（0为不限）和溢出策略
+        self.queue_capacity: int = 0
+        self.queue_policy: int = QUEUE_OVERFLOW_DROP
+        self.queue_overflow: int = 0
+
+        # 延时统计模式下，记录行情各处理阶段的延时直方图
+        self.latency_mode: bool = False
+        self.latency: dict[str, LatencyHistogram] = {
+            "callback": LatencyHistogram(),     # 进入onRtnDepthMarketData到on_tick返回
+            "exchange": LatencyHistogram(),     # 交易所行情时间到进入onRtnDepthMarketData，精度为1毫秒
+        }
+
+        # 设置共享内存表路径后，每笔行情都写入最新行情表，供本机其他进程直接读取
+        self.snapshot_path: str = ""
+        self.snapshot_capacity: int = 4096
+        self.snapshot: TickSnapshotWriter | None = None
+
+        # 设置列式存储目录后，行情按交易日和合约写入内存映射的列文件
+        self.store_path: str = ""
+        self.store: TickStore | None = None
+
+        # K线合成模式下，按合约增量合成1秒和1分钟K线并推送
+        self.bar_mode: bool = False
+        self.bar_aggregator: BarAggregator | None = None
+
     def onFrontConnected(self) -> None:
         """服务器连接成功回报"""
         self.gateway.write_log("行情服务器连接成功")
@@ -250,8 +615,7 @@ class FemasMdApi(MdApi):
             self.login_status = True
             self.gateway.write_log("行情服务器登录成功")
 
-            for symbol in self.subscribed:
-                self.subMarketData(symbol)
+            self.sub_market_data(list(self.subscribed))
         else:
             self.gateway.write_error("行情服务器登录失败", error)
 
@@ -268,14 +632,22 @@ class FemasMdApi(MdApi):
 
     def onRtnDepthMarketData(self, data: dict) -> None:
         """行情数据推送"""
+        start: int = perf_counter_ns() if self.latency_mode else 0
+
         symbol: str = data["InstrumentID"]
         contract: ContractData = symbol_contract_map.get(symbol, None)
         if not contract:
             return
 
-        timestamp: str = f"{data['TradingDay']} {data['UpdateTime']}.{int(data['UpdateMillisec'] / 100)}"
-        dt: datetime = datetime.strptime(timestamp, "%Y%m%d %H:%M:%S.%f")
-        dt = dt.replace(tzinfo=CHINA_TZ)
+        dt: datetime = self.decoder.decode(data["TradingDay"], data["UpdateTime"], data["UpdateMillisec"])
+
+        # 存储和K线合成使用按行情发生的自然日解析的时间，保证夜盘和日盘数据按时间递增
+        action_dt: datetime | None = None
+        if self.store or self.bar_aggregator:
+            action_dt = self.decode_action_time(data)
+
+        if self.store and action_dt:
+            self.store.append(symbol, data["TradingDay"], action_dt, data)
 
         tick: TickData = TickData(
             symbol=symbol,
@@ -296,7 +668,93 @@ class FemasMdApi(MdApi):
             ask_volume_1=data["AskVolume1"],
             gateway_name=self.gateway_name,
         )
-        self.gateway.on_tick(tick)
+
+        if self.snapshot:
+            self.snapshot.write(tick)
+
+        if self.shared:
+            # 每个接口推送各自的副本，gateway_name为该接口名称，接收方修改行情对象时互不影响
+            for gateway, publish in self.tick_targets.get(symbol, []):
+                if gateway is self.gateway:
+                    gateway.process_tick(tick, publish)
+                else:
+                    target_tick: TickData = copy(tick)
+                    target_tick.gateway_name = gateway.gateway_name
+                    gateway.process_tick(target_tick, publish)
+        else:
+            self.gateway.process_tick(tick)
+
+        if start:
+            self.record_latency(start, data)
+
+        if self.bar_aggregator and action_dt:
+            self.bar_aggregator.update(
+                symbol,
+                contract.exchange,
+                action_dt,
+                data["TradingDay"],
+                data["LastPrice"],
+                data["Volume"],
+                data["Turnover"],
+                data["OpenInterest"],
+            )
+
+    def on_bar(self, bar: BarData, window: int) -> None:
+        """推送合成完成的K线，共享模式下每个EventEngine只推送一次"""
+        if self.shared:
+            gateways: list[FemasGateway] = [
+                gateway for gateway, publish in self.tick_targets.get(bar.symbol, []) if publish
+            ]
+        else:
+            gateways = [self.gateway]
+
+        event_type: str = BAR_EVENTS[window]
+        for gateway in gateways:
+            if gateway.gateway_name == bar.gateway_name:
+                target_bar: BarData = bar
+            else:
+                target_bar = copy(bar)
+                target_bar.gateway_name = gateway.gateway_name
+
+            gateway.on_event(event_type, target_bar)
+            gateway.on_event(event_type + bar.vt_symbol, target_bar)
+
+    def flush_bars(self) -> None:
+        """推送行情中断后超时未完成的K线"""
+        if self.bar_aggregator:
+            self.bar_aggregator.flush()
+
+    def decode_action_time(self, data: dict) -> datetime:
+        """按行情发生的自然日（ActionDay）解析行情时间，夜盘行情的交易日为下一交易日，不能按时间排序"""
+        dt: datetime = self.decoder.decode(
+            data["ActionDay"] or data["TradingDay"], data["UpdateTime"], data["UpdateMillisec"]
+        )
+        return dt
+
+    def record_latency(self, start: int, data: dict) -> None:
+        """记录Python回调处理延时，以及交易所行情时间到进入回调的延时"""
+        cost: int = perf_counter_ns() - start
+        self.latency["callback"].record(cost)
+
+        # 夜盘行情的交易日为下一交易日，交易所时间戳按行情发生的自然日和原始毫秒数计算，精度为1毫秒
+        second: datetime = self.decoder.decode(data["ActionDay"] or data["TradingDay"], data["UpdateTime"])
+        exchange_time: int = int(second.timestamp()) * 1_000_000_000
+
+        millisec: int = data["UpdateMillisec"]
+        if 0 < millisec < 1000:
+            exchange_time += millisec * 1_000_000
+
+        # 本地时钟和交易所时钟之间的偏差会计入该阶段
+        self.latency["exchange"].record(time_ns() - cost - exchange_time)
+
+    def onRtnDepthMarketDataCompact(self, data: dict) -> None:
+        """行情数据推送（精简模式，字段访问方式和字典一致）"""
+        self.onRtnDepthMarketData(data)
+
+    def onRtnDepthMarketDataBatch(self, data: list) -> None:
+        """行情数据批量推送"""
+        for d in data:
+            self.onRtnDepthMarketData(d)
 
     def connect(self, address: str, userid: str, password: str, brokerid: str) -> None:
         """连接服务器"""
@@ -308,6 +766,22 @@ class FemasMdApi(MdApi):
         if not self.connect_status:
             path: Path = get_folder_path(self.gateway_name.lower())
             self.createFtdcMdApi((str(path) + "\\Md").encode("GBK"))
+            self.setCompactMode(self.compact_mode)
+            self.setConflateMode(self.conflate_mode)
+            self.setBatchMode(self.batch_mode)
+            self.setTickBatchMode(self.tick_batch_mode)
+            self.setQueueCapacity(self.queue_capacity, self.queue_policy)
+            self.setLatencyMode(self.latency_mode)
+
+            if self.snapshot_path:
+                self.snapshot = TickSnapshotWriter(self.snapshot_path, self.snapshot_capacity)
+
+            if self.store_path:
+                self.store = TickStore(self.store_path, on_error=self.gateway.write_log)
+                self.store.start()
+
+            if self.bar_mode:
+                self.bar_aggregator = BarAggregator(self.on_bar, tuple(BAR_EVENTS), gateway_name=self.gateway_name)
 
             self.subscribeMarketDataTopic(100, 2)
             self.registerFront(address)
@@ -329,17 +803,166 @@ class FemasMdApi(MdApi):
         self.reqid += 1
         self.reqUserLogin(req, self.reqid)
 
-    def subscribe(self, req: SubscribeRequest) -> None:
+    def subscribe(self, req: SubscribeRequest, gateway: FemasGateway | None = None) -> None:
         """订阅行情"""
+        self.subscribe_batch([req], gateway)
+
+    def unsubscribe(self, req: SubscribeRequest, gateway: FemasGateway | None = None) -> None:
+        """退订行情，最后一个订阅者退订后才向服务器退订"""
+        self.unsubscribe_batch([req], gateway)
+
+    def subscribe_batch(self, reqs: list[SubscribeRequest], gateway: FemasGateway | None = None) -> None:
+        """批量订阅行情，已有其他使用者订阅的合约无需重复订阅"""
+        if not gateway:
+            gateway = self.gateway
+
+        symbols: list[str] = []
+
+        for req in reqs:
+            subscribers: list[FemasGateway] = self.subscribers.setdefault(req.symbol, [])
+            if gateway not in subscribers:
+                subscribers.append(gateway)
+                self.update_tick_targets(req.symbol)
+
+            if req.symbol not in self.subscribed:
+                self.subscribed.add(req.symbol)
+                symbols.append(req.symbol)
+
         if self.login_status:
-            self.subMarketData(req.symbol)
-        self.subscribed.add(req.symbol)
+            self.sub_market_data(symbols)
+
+    def unsubscribe_batch(self, reqs: list[SubscribeRequest], gateway: FemasGateway | None = None) -> None:
+        """批量退订行情"""
+        if not gateway:
+            gateway = self.gateway
+
+        symbols: list[str] = [req.symbol for req in reqs if self.remove_subscriber(req.symbol, gateway)]
+
+        if self.login_status:
+            self.unsub_market_data(symbols)
+
+    def remove_subscriber(self, symbol: str, gateway: FemasGateway) -> bool:
+        """移除合约行情的订阅者，返回是否已没有订阅者需要向服务器退订"""
+        subscribers: list[FemasGateway] | None = self.subscribers.get(symbol, None)
+        if not subscribers or gateway not in subscribers:
+            return False
+
+        subscribers.remove(gateway)
+        if subscribers:
+            self.update_tick_targets(symbol)
+            return False
+
+        self.subscribers.pop(symbol)
+        self.tick_targets.pop(symbol, None)
+        self.subscribed.discard(symbol)
+        return True
+
+    def sub_market_data(self, symbols: list[str]) -> None:
+        """分批调用底层函数订阅合约行情"""
+        for i in range(0, len(symbols), SUBSCRIBE_CHUNK_SIZE):
+            self.subMarketDataBatch(symbols[i: i + SUBSCRIBE_CHUNK_SIZE])
+
+    def unsub_market_data(self, symbols: list[str]) -> None:
+        """分批调用底层函数退订合约行情"""
+        for i in range(0, len(symbols), SUBSCRIBE_CHUNK_SIZE):
+            self.unSubMarketDataBatch(symbols[i: i + SUBSCRIBE_CHUNK_SIZE])
+
+    def update_tick_targets(self, symbol: str) -> None:
+        """更新合约行情的分发目标，所有订阅者都会调用直连回调，但每个EventEngine只推送一次"""
+        targets: list[tuple[FemasGateway, bool]] = []
+        engines: list[EventEngine] = []
+
+        for gateway in self.subscribers.get(symbol, []):
+            publish: bool = gateway.event_engine not in engines
+            if publish:
+                engines.append(gateway.event_engine)
+            targets.append((gateway, publish))
+
+        self.tick_targets[symbol] = targets
+
+    def add_gateway(self, gateway: FemasGateway) -> None:
+        """添加共享行情连接的使用者"""
+        if gateway not in self.gateways:
+            self.gateways.append(gateway)
+
+    def remove_gateway(self, gateway: FemasGateway) -> int:
+        """移除共享行情连接的使用者并退订其行情，返回剩余使用者数量"""
+        if gateway in self.gateways:
+            self.gateways.remove(gateway)
+
+        # 没有剩余使用者时连接即将关闭，无需逐个退订
+        if not self.gateways:
+            return 0
+
+        symbols: list[str] = [symbol for symbol in list(self.subscribers) if self.remove_subscriber(symbol, gateway)]
+        if self.login_status:
+            self.unsub_market_data(symbols)
+
+        # 日志输出和行情数据所属接口转交给剩余的使用者
+        if gateway is self.gateway:
+            self.gateway = self.gateways[0]
+            self.gateway_name = self.gateway.gateway_name
+
+            if self.bar_aggregator:
+                self.bar_aggregator.gateway_name = self.gateway_name
+
+        return len(self.gateways)
+
+    def get_queue_stats(self) -> dict:
+        """查询回调队列统计数据"""
+        stats: dict = self.getQueueStats()
+        return stats
+
+    def set_latency_mode(self, latency: bool) -> None:
+        """开启或关闭延时统计"""
+        self.latency_mode = latency
+
+        if self.connect_status:
+            self.setLatencyMode(latency)
+
+    def get_latency_stats(self) -> dict[str, dict]:
+        """查询各处理阶段的延时统计：queue入队等待，dispatch数据转换，callback回调处理，exchange交易所到本地"""
+        stats: dict[str, dict] = {}
+
+        if self.connect_status:
+            native_stats: dict = self.getLatencyStats()
+            for name, data in native_stats.items():
+                stats[name] = summarize_histogram(data["buckets"], data["count"], data["total"], data["max"])
+
+        for name, histogram in self.latency.items():
+            stats[name] = histogram.get_stats()
+
+        return stats
+
+    def reset_latency_stats(self) -> None:
+        """清空延时统计"""
+        if self.connect_status:
+            self.resetLatencyStats()
+
+        for histogram in self.latency.values():
+            histogram.reset()
+
+    def get_conflate_dropped(self) -> dict[str, int]:
+        """查询合并模式下各合约被丢弃的行情数量"""
+        if not self.connect_status:
+            return {}
+
+        dropped: dict[str, int] = self.getConflateDropped()
+        return dropped
 
     def close(self) -> None:
         """关闭连接"""
         if self.connect_status:
             self.exit()
 
+        if self.snapshot:
+            self.snapshot.close()
+            self.snapshot = None
+
+        if self.store:
+            self.store.stop()
+            self.store = None
+
 
 class FemasTdApi(TdApi):
     """"""
@@ -365,8 +988,77 @@ class FemasTdApi(TdApi):
         self.auth_code: str = ""
         self.appid: str = ""
 
-        self.positions: dict[str, PositionData] = {}
-        self.tradeids: set = set()
+        self.tradeids: TradeIdFilter = TradeIdFilter()
+
+        # 委托状态缓存，只在委托状态、成交数量等字段变化时推送
+        self.orders: dict[str, OrderData] = {}
+        self.order_states: dict[str, tuple] = {}
+        self.order_suppressed: int = 0
+        self.login_trading_day: str = ""
+
+        # 本地持仓簿，由成交和委托回报实时更新，定时查询仅用于校准
+        self.positions: dict[tuple[str, Direction], PositionData] = {}
+        self.query_positions: dict[tuple[str, Direction], PositionData] = {}
+        self.order_frozen: dict[str, float] = {}
+        self.book_inited: bool = False
+        self.trade_count: int = 0
+        self.query_trade_count: int = 0
+        self.position_drift: int = 0
+
+        # 持仓和资金只在数据变化时推送，记录上次推送的状态和被过滤的次数
+        self.position_states: dict[tuple[str, Direction], tuple[float, float, float, float]] = {}
+        self.position_suppressed: int = 0
+        self.accounts: dict[str, AccountData] = {}
+        self.account_suppressed: int = 0
+
+        self.decoder: TimestampDecoder = TimestampDecoder()
+
+        # 合约信息缓存，登录后按柜台交易日加载缓存，查询完成后再刷新
+        self.contract_cache: bool = True
+        self.cache: ContractCache | None = None
+        self.query_contracts: dict[str, ContractData] = {}
+
+        # 期权到期日解析缓存，同一到期日只解析一次
+        self.expiry_cache: dict[str, datetime] = {}
+
+        # 批量模式下，变化的合约只通过EVENT_CONTRACT_BATCH事件按CONTRACT_CHUNK_SIZE分批推送，不再逐个推送合约事件，
+        # OmsEngine不处理该事件，需要get_contract的使用方应自行处理批量事件
+        self.contract_batch_mode: bool = False
+
+        # 请求流控，查询请求受柜台每秒1笔的限制，交易请求默认不限速
+        self.query_rate: float = 1
+        self.trade_rate: float = 0
+        self.query_scheduler: RequestScheduler = RequestScheduler(self.query_rate, 1, self.on_request_error)
+        self.trade_scheduler: RequestScheduler = RequestScheduler(self.trade_rate, 1, self.on_request_error)
+
+        # 委托模板模式下，底层缓存预先填好的委托结构体，每笔委托只需修改价格、数量和委托号
+        self.template_mode: bool = True
+        self.order_templates: dict[tuple, int] = {}
+
+        # 模板包含投资者代码，登录后查询到投资者代码才重建模板，排队中的旧模板委托按版本号丢弃
+        # 检查版本号和发送委托、清空和重建模板都需持有该锁，避免使用刚被清空的模板发送委托
+        self.templates_ready: bool = False
+        self.template_generation: int = 0
+        self.template_lock: Lock = Lock()
+
+        self.latency_tracker: OrderLatencyTracker = OrderLatencyTracker()
+
+        # 直连回调，在底层回调线程中同步调用，键为order、trade、account、position
+        # 注册和注销时整体替换元组，回调线程遍历期间不受其他线程修改影响
+        self.callbacks: dict[str, tuple[Callable, ...]] = {
+            "order": (),
+            "trade": (),
+            "account": (),
+            "position": (),
+        }
+
+        # 批量模式下，底层一次取出所有待处理回调并只获取一次GIL
+        self.batch_mode: bool = False
+
+        # 回调队列容量（0为不限）和溢出策略，交易回报不会被丢弃
+        self.queue_capacity: int = 0
+        self.queue_policy: int = QUEUE_OVERFLOW_LOG
+        self.queue_overflow: int = 0
 
     def onFrontConnected(self) -> None:
         """服务器连接成功回报"""
@@ -400,6 +1092,17 @@ class FemasTdApi(TdApi):
             self.login_status = True
             self.gateway.write_log("交易服务器登录成功")
 
+            # 交易日切换后清空委托缓存，同一交易日内重连时保留以过滤私有流重放
+            if data["TradingDay"] != self.login_trading_day:
+                self.login_trading_day = data["TradingDay"]
+                self.orders.clear()
+                self.order_states.clear()
+
+                self.load_contracts()
+
+            # 委托模板中包含投资者代码，查询到投资者代码后再重建
+            self.templates_ready = False
+
             self.query_investor()
         else:
             self.login_failed = True
@@ -411,16 +1114,27 @@ class FemasTdApi(TdApi):
         self.investorid = data['InvestorID']
         self.gateway.write_log("投资者代码查询成功")
 
-        sleep(1)    # 由于流量控制，需要等待1秒钟
+        with self.template_lock:
+            self.order_templates.clear()
+            self.clearOrderTemplates()
+            self.template_generation += 1
+            self.templates_ready = True
+
         self.reqid += 1
-        self.reqQryInstrument({}, self.reqid)
+        self.query_scheduler.submit(self.reqQryInstrument, ({}, self.reqid), PRIORITY_SETUP)
 
     def onRspOrderInsert(self, data: dict, error: dict, reqid: int, last: bool) -> None:
         """委托下单失败回报"""
+        orderid: str = data["UserOrderLocalID"]
+        self.latency_tracker.on_ack(orderid)
+
         if not error["ErrorID"]:
+            if self.callbacks["order"] and orderid in self.orders:
+                self.run_callbacks("order", self.orders[orderid])
             return
 
-        orderid: str = data["UserOrderLocalID"]
+        self.latency_tracker.on_reject(orderid)
+
         symbol: str = data["InstrumentID"]
         contract: ContractData = symbol_contract_map[symbol]
 
@@ -435,8 +1149,12 @@ class FemasTdApi(TdApi):
             status=Status.REJECTED,
             gateway_name=self.gateway_name,
         )
+        self.orders[orderid] = order
         self.gateway.on_order(order)
 
+        if self.callbacks["order"]:
+            self.run_callbacks("order", order)
+
         self.gateway.write_error("交易委托失败", error)
 
     def onRspOrderAction(self, data: dict, error: dict, reqid: int, last: bool) -> None:
@@ -444,6 +1162,8 @@ class FemasTdApi(TdApi):
         if not error["ErrorID"]:
             return
 
+        self.latency_tracker.on_cancel_fail(data["UserOrderLocalID"])
+
         self.gateway.write_error("交易撤单失败", error)
 
     def onRspSettlementInfoConfirm(
@@ -453,29 +1173,26 @@ class FemasTdApi(TdApi):
         self.gateway.write_log("结算信息确认成功")
 
         self.reqid += 1
-        self.reqQryInstrument({}, self.reqid)
+        self.query_scheduler.submit(self.reqQryInstrument, ({}, self.reqid), PRIORITY_SETUP)
 
     def onRspQryInvestorPosition(self, data: dict, error: dict, reqid: int, last: bool) -> None:
         """持仓查询回报"""
-        if not data:
-            return
-
         # 必须收到了合约信息后才能处理
-        symbol: str = data["InstrumentID"]
+        symbol: str = data["InstrumentID"] if data else ""
         contract: ContractData = symbol_contract_map.get(symbol, None)
 
         if contract:
             # 获取之前缓存的持仓数据缓存
-            key: str = f"{data['InstrumentID'], data['Direction']}"
-            position: PositionData = self.positions.get(key, None)
+            key: tuple[str, Direction] = (symbol, DIRECTION_FEMAS2VT[data["Direction"]])
+            position: PositionData = self.query_positions.get(key, None)
             if not position:
                 position = PositionData(
-                    symbol=data["InstrumentID"],
+                    symbol=symbol,
                     exchange=contract.exchange,
-                    direction=DIRECTION_FEMAS2VT[data["Direction"]],
+                    direction=key[1],
                     gateway_name=self.gateway_name,
                 )
-                self.positions[key] = position
+                self.query_positions[key] = position
 
             position.yd_volume = data["YdPosition"]
             # 计算之前已有仓位的持仓总成本
@@ -493,21 +1210,33 @@ class FemasTdApi(TdApi):
             position.frozen += data["FrozenPosition"]
 
         if last:
-            for position in self.positions.values():
-                self.gateway.on_position(position)
+            self.reconcile_positions()
 
-            self.positions.clear()
+            if self.callbacks["position"]:
+                self.run_callbacks("position", [copy(position) for position in self.positions.values()])
 
     def onRspQryInvestorAccount(self, data: dict, error: dict, reqid: int, last: bool) -> None:
         """资金查询回报"""
-        account: AccountData = AccountData(
-            accountid=data["AccountID"],
-            frozen=data["LongMargin"] + data["ShortMargin"],
-            balance=data["PreBalance"],
-            gateway_name=self.gateway_name,
-        )
-
-        self.gateway.on_account(account)
+        accountid: str = data["AccountID"]
+        frozen: float = data["LongMargin"] + data["ShortMargin"]
+        balance: float = data["PreBalance"]
+
+        # 资金没有变化时不重复推送，直连回调仍然收到最新资金
+        account: AccountData | None = self.accounts.get(accountid, None)
+        if account and account.frozen == frozen and account.balance == balance:
+            self.account_suppressed += 1
+        else:
+            account = AccountData(
+                accountid=accountid,
+                frozen=frozen,
+                balance=balance,
+                gateway_name=self.gateway_name,
+            )
+            self.accounts[accountid] = account
+            self.gateway.on_account(account)
+
+        if self.callbacks["account"]:
+            self.run_callbacks("account", account)
 
     def onRspQryInstrument(self, data: dict, error: dict, reqid: int, last: bool) -> None:
         """合约查询回报"""
@@ -541,51 +1270,107 @@ class FemasTdApi(TdApi):
             contract.option_type = OPTIONTYPE_FEMAS2VT.get(data["OptionsType"], None)
             contract.option_strike = data["StrikePrice"]
             contract.option_index = str(data["StrikePrice"])
-            contract.option_expiry = datetime.strptime(data["ExpireDate"], "%Y%m%d")
-
-        self.gateway.on_contract(contract)
+            contract.option_expiry = self.parse_expiry(data["ExpireDate"])
 
-        symbol_contract_map[contract.symbol] = contract
+        self.query_contracts[contract.symbol] = contract
 
+        # 查询完成后再统一更新合约字典并推送
         if last:
+            self.publish_contracts(list(self.query_contracts.values()))
             self.gateway.write_log("合约信息查询成功")
 
+            # 缓存写入失败不影响交易，只记录日志
+            if self.cache:
+                try:
+                    self.cache.save(self.login_trading_day, list(self.query_contracts.values()))
+                except Exception as e:
+                    self.gateway.write_log(f"合约信息缓存保存失败：{e!r}")
+            self.query_contracts.clear()
+
+    def parse_expiry(self, date: str) -> datetime:
+        """解析期权到期日（%Y%m%d）"""
+        expiry: datetime | None = self.expiry_cache.get(date, None)
+        if expiry is None:
+            expiry = datetime.strptime(date, "%Y%m%d")
+            self.expiry_cache[date] = expiry
+        return expiry
+
+    def publish_contracts(self, contracts: list[ContractData]) -> None:
+        """以完整的合约列表替换全局合约字典，并推送有变化的合约"""
+        global symbol_contract_map
+
+        contract_map: dict[str, ContractData] = {contract.symbol: contract for contract in contracts}
+
+        # 已从缓存加载且没有变化的合约无需重复推送
+        changes: list[ContractData] = [
+            contract for contract in contracts
+            if symbol_contract_map.get(contract.symbol, None) != contract
+        ]
+
+        if not changes and contract_map.keys() == symbol_contract_map.keys():
+            return
+
+        # 整体替换字典，已下市的合约随之移除，其他线程查找合约时不会看到更新了一半的字典
+        symbol_contract_map = contract_map
+
+        if self.contract_batch_mode:
+            for i in range(0, len(changes), CONTRACT_CHUNK_SIZE):
+                self.gateway.on_event(EVENT_CONTRACT_BATCH, changes[i: i + CONTRACT_CHUNK_SIZE])
+        else:
+            for contract in changes:
+                self.gateway.on_contract(contract)
+
     def onRtnOrder(self, data: dict) -> None:
         """委托更新推送"""
-        timestamp: str = f"{data['InsertDate']} {data['InsertTime']}"
-        dt: datetime = datetime.strptime(timestamp, "%Y%m%d %H:%M:%S")
-        dt = dt.replace(tzinfo=CHINA_TZ)
+        # 过滤状态没有变化的重复委托推送
+        orderid: str = data["UserOrderLocalID"]
+        state: tuple = (data["OrderStatus"], data["VolumeTraded"], data["Volume"], data["LimitPrice"])
+        if self.order_states.get(orderid, None) == state:
+            self.order_suppressed += 1
+            return
+        self.order_states[orderid] = state
+
+        self.latency_tracker.on_ack(orderid)
+        if data["OrderStatus"] == USTP_FTDC_OS_Canceled:
+            self.latency_tracker.on_cancel(orderid)
+
+        dt: datetime = self.decoder.decode(data["InsertDate"], data["InsertTime"])
 
         order: OrderData = OrderData(
             symbol=data["InstrumentID"],
             exchange=EXCHANGE_FEMAS2VT[data["ExchangeID"]],
-            orderid=data["UserOrderLocalID"],
+            orderid=orderid,
             direction=DIRECTION_FEMAS2VT[data["Direction"]],
             offset=OFFSET_FEMAS2VT[data["OffsetFlag"]],
             price=data["LimitPrice"],
             volume=data["Volume"],
             traded=data["VolumeTraded"],
             status=STATUS_FEMAS2VT[data["OrderStatus"]],
-            datettime=dt,
+            datetime=dt,
             gateway_name=self.gateway_name,
         )
 
-        self.localid = max(self.localid, int(order.orderid))
+        self.localid = max(self.localid, int(orderid))
+        self.orders[orderid] = order
         self.gateway.on_order(order)
 
+        if self.callbacks["order"]:
+            self.run_callbacks("order", order)
+
+        self.update_position_by_order(order)
+
     def onRtnTrade(self, data: dict) -> None:
         """成交数据推送"""
         # 过滤重复交易数据推送
         tradeid: str = data["TradeID"]
-        if tradeid in self.tradeids:
+        if not self.tradeids.add(tradeid, data["TradingDay"]):
             return
-        self.tradeids.add(tradeid)
 
-        timestamp: str = f"{data['TradeDate']} {data['TradeTime']}"
-        dt: datetime = datetime.strptime(timestamp, "%Y%m%d %H:%M:%S")
-        dt = dt.replace(tzinfo=CHINA_TZ)
+        self.latency_tracker.on_fill(data["UserOrderLocalID"])
+
+        dt: datetime = self.decoder.decode(data["TradeDate"], data["TradeTime"])
 
-        trade: OrderData = TradeData(
+        trade: TradeData = TradeData(
             symbol=data["InstrumentID"],
             exchange=EXCHANGE_FEMAS2VT[data["ExchangeID"]],
             orderid=data["UserOrderLocalID"],
@@ -600,6 +1385,156 @@ class FemasTdApi(TdApi):
 
         self.gateway.on_trade(trade)
 
+        if self.callbacks["trade"]:
+            self.run_callbacks("trade", trade)
+
+        self.trade_count += 1
+        self.update_position_by_trade(trade)
+
+    def add_callback(self, name: str, callback: Callable) -> None:
+        """注册直连回调"""
+        callbacks: tuple[Callable, ...] = self.callbacks[name]
+        if callback not in callbacks:
+            self.callbacks[name] = callbacks + (callback,)
+
+    def remove_callback(self, name: str, callback: Callable) -> None:
+        """注销直连回调"""
+        callbacks: tuple[Callable, ...] = self.callbacks[name]
+        if callback in callbacks:
+            self.callbacks[name] = tuple(c for c in callbacks if c != callback)
+
+    def run_callbacks(self, name: str, data: object) -> None:
+        """调用直连回调，单个回调的异常不影响其他回调"""
+        for callback in self.callbacks[name]:
+            try:
+                callback(data)
+            except Exception as e:
+                self.gateway.write_log(f"直连回调{name}触发异常：{e!r}")
+
+    def reconcile_positions(self) -> None:
+        """用持仓查询结果校准本地持仓簿，并报告偏差"""
+        positions: dict[tuple[str, Direction], PositionData] = self.query_positions
+        self.query_positions = {}
+
+        # 查询期间有新的成交，查询结果可能已经过期
+        if self.trade_count != self.query_trade_count:
+            return
+
+        for key in self.positions.keys() | positions.keys():
+            local: PositionData | None = self.positions.get(key, None)
+            remote: PositionData | None = positions.get(key, None)
+
+            local_volume: tuple[float, float] = (local.volume, local.yd_volume) if local else (0, 0)
+            remote_volume: tuple[float, float] = (remote.volume, remote.yd_volume) if remote else (0, 0)
+
+            if self.book_inited and local_volume != remote_volume:
+                self.position_drift += 1
+                self.gateway.write_log(
+                    f"本地持仓偏差{key[0]} {key[1].value}，"
+                    f"本地总仓{local_volume[0]}昨仓{local_volume[1]}，"
+                    f"柜台总仓{remote_volume[0]}昨仓{remote_volume[1]}"
+                )
+
+            if not local:
+                if not remote:
+                    continue
+                local = remote
+                self.positions[key] = local
+            elif remote:
+                local.volume = remote.volume
+                local.yd_volume = remote.yd_volume
+                local.frozen = remote.frozen
+                local.price = remote.price
+            else:
+                local.volume = 0
+                local.yd_volume = 0
+                local.frozen = 0
+
+            self.emit_position(local)
+
+        self.book_inited = True
+
+    def update_position_by_trade(self, trade: TradeData) -> None:
+        """根据成交更新本地持仓"""
+        if not self.book_inited:
+            return
+
+        # 买开和卖平对应多头持仓，卖开和买平对应空头持仓
+        if (trade.direction == Direction.LONG) == (trade.offset == Offset.OPEN):
+            direction: Direction = Direction.LONG
+        else:
+            direction = Direction.SHORT
+
+        key: tuple[str, Direction] = (trade.symbol, direction)
+        position: PositionData | None = self.positions.get(key, None)
+        if not position:
+            position = PositionData(
+                symbol=trade.symbol,
+                exchange=trade.exchange,
+                direction=direction,
+                gateway_name=self.gateway_name,
+            )
+            self.positions[key] = position
+
+        if trade.offset == Offset.OPEN:
+            cost: float = position.price * position.volume + trade.price * trade.volume
+            position.volume += trade.volume
+            position.price = cost / position.volume
+        else:
+            position.volume = max(position.volume - trade.volume, 0)
+
+            # 平今不影响昨仓，平仓优先平昨仓
+            if trade.offset != Offset.CLOSETODAY:
+                position.yd_volume = max(position.yd_volume - trade.volume, 0)
+            position.yd_volume = min(position.yd_volume, position.volume)
+
+        self.emit_position(position)
+
+    def update_position_by_order(self, order: OrderData) -> None:
+        """根据平仓委托的剩余数量更新本地持仓冻结"""
+        if order.offset == Offset.OPEN:
+            return
+
+        if order.is_active():
+            remaining: float = order.volume - order.traded
+        else:
+            remaining = 0
+
+        previous: float = self.order_frozen.pop(order.orderid, 0)
+        if remaining:
+            self.order_frozen[order.orderid] = remaining
+
+        if remaining == previous:
+            return
+
+        if order.direction == Direction.LONG:
+            direction: Direction = Direction.SHORT
+        else:
+            direction = Direction.LONG
+
+        position: PositionData | None = self.positions.get((order.symbol, direction), None)
+        if not position:
+            return
+
+        position.frozen = max(position.frozen + remaining - previous, 0)
+        self.emit_position(position)
+
+    def emit_position(self, position: PositionData) -> None:
+        """推送持仓副本，持仓数量、冻结和均价都没有变化时不推送"""
+        key: tuple[str, Direction] = (position.symbol, position.direction)
+        state: tuple[float, float, float, float] = (
+            position.volume, position.yd_volume, position.frozen, position.price
+        )
+
+        if self.position_states.get(key, None) == state:
+            self.position_suppressed += 1
+            return
+
+        self.position_states[key] = state
+
+        # 持仓簿中的对象会被后续回报原地修改，推送副本避免已推送的数据被改变
+        self.gateway.on_position(copy(position))
+
     def connect(
         self,
         address: str,
@@ -619,7 +1554,18 @@ class FemasTdApi(TdApi):
 
         if not self.connect_status:
             path: Path = get_folder_path(self.gateway_name.lower())
+
+            if self.contract_cache:
+                self.cache = ContractCache(path.joinpath("contract_cache.pkl"))
+
             self.createFtdcTraderApi(str(path) + "\\Td")
+            self.setBatchMode(self.batch_mode)
+            self.setQueueCapacity(self.queue_capacity, self.queue_policy)
+
+            self.query_scheduler.rate = self.query_rate
+            self.trade_scheduler.rate = self.trade_rate
+            self.query_scheduler.start()
+            self.trade_scheduler.start()
 
             self.subscribePrivateTopic(0)
             self.subscribePublicTopic(0)
@@ -641,7 +1587,7 @@ class FemasTdApi(TdApi):
         }
 
         self.reqid += 1
-        self.reqDSUserCertification(req, self.reqid)
+        self.trade_scheduler.submit(self.reqDSUserCertification, (req, self.reqid))
 
     def login(self) -> None:
         """用户登录"""
@@ -656,7 +1602,23 @@ class FemasTdApi(TdApi):
         }
 
         self.reqid += 1
-        self.reqUserLogin(req, self.reqid)
+        self.trade_scheduler.submit(self.reqUserLogin, (req, self.reqid))
+
+    def load_contracts(self) -> None:
+        """加载登录交易日的合约信息缓存并推送"""
+        if not self.cache:
+            return
+
+        contracts: list[ContractData] = self.cache.load(self.login_trading_day)
+        if not contracts:
+            return
+
+        for contract in contracts:
+            contract.gateway_name = self.gateway_name
+
+        self.publish_contracts(contracts)
+
+        self.gateway.write_log(f"合约信息缓存加载成功，共{len(contracts)}个")
 
     def query_investor(self) -> None:
         """委托查询可用投资者"""
@@ -667,7 +1629,7 @@ class FemasTdApi(TdApi):
             "UserID": self.userid,
         }
 
-        self.reqQryUserInvestor(req, self.reqid)
+        self.query_scheduler.submit(self.reqQryUserInvestor, (req, self.reqid), PRIORITY_SETUP)
 
     def send_order(self, req: OrderRequest) -> str:
         """委托下单"""
@@ -675,21 +1637,155 @@ class FemasTdApi(TdApi):
             self.gateway.write_log("请选择开平方向")
             return ""
 
+        if self.template_mode and not self.templates_ready:
+            self.gateway.write_log("投资者代码尚未查询成功，无法委托下单")
+            return ""
+
         self.localid += 1
         orderid: str = str(self.localid).rjust(12, "0")
 
+        self.reqid += 1
+        self.latency_tracker.on_send(orderid, req.symbol, req.exchange.value)
+
+        if self.template_mode:
+            with self.template_lock:
+                generation: int = self.template_generation
+                template_id: int = self.get_order_template(req)
+
+            self.trade_scheduler.submit(
+                self.insert_order_template,
+                (generation, template_id, req.price, int(req.volume), orderid, self.reqid)
+            )
+        else:
+            femas_req: dict = self.generate_order_request(req)
+            femas_req["LimitPrice"] = req.price
+            femas_req["Volume"] = int(req.volume)
+            femas_req["UserOrderLocalID"] = orderid
+
+            self.trade_scheduler.submit(self.reqOrderInsert, (femas_req, self.reqid))
+
+        order: OrderData = req.create_order_data(orderid, self.gateway_name)
+        self.orders[orderid] = order
+        self.gateway.on_order(order)
+
+        vt_orderid: str = order.vt_orderid
+        return vt_orderid
+
+    def send_orders(self, reqs: list[OrderRequest]) -> list[str]:
+        """批量委托下单，整批请求一次性交给底层发送"""
+        if not self.template_mode or not self.templates_ready:
+            return [self.send_order(req) for req in reqs]
+
+        items: list[tuple[int, float, int, str]] = []
+        orders: list[OrderData] = []
+        vt_orderids: list[str] = []
+
+        # 整批委托使用同一版本的模板
+        with self.template_lock:
+            generation: int = self.template_generation
+
+            for req in reqs:
+                if req.offset not in OFFSET_VT2FEMAS:
+                    self.gateway.write_log("请选择开平方向")
+                    vt_orderids.append("")
+                    continue
+
+                self.localid += 1
+                orderid: str = str(self.localid).rjust(12, "0")
+
+                items.append((self.get_order_template(req), req.price, int(req.volume), orderid))
+                self.latency_tracker.on_send(orderid, req.symbol, req.exchange.value)
+
+                order: OrderData = req.create_order_data(orderid, self.gateway_name)
+                self.orders[orderid] = order
+                orders.append(order)
+                vt_orderids.append(order.vt_orderid)
+
+        if items:
+            reqid: int = self.reqid + 1
+            self.reqid += len(items)
+            self.trade_scheduler.submit(self.insert_orders, (generation, items, reqid))
+
+            for order in orders:
+                self.gateway.on_order(order)
+
+        return vt_orderids
+
+    def insert_order_template(
+        self,
+        generation: int,
+        template_id: int,
+        price: float,
+        volume: int,
+        orderid: str,
+        reqid: int
+    ) -> int:
+        """调用底层模板下单，模板已重建时拒绝该委托"""
+        with self.template_lock:
+            if generation == self.template_generation:
+                n: int = self.reqOrderInsertTemplate(template_id, price, volume, orderid, reqid)
+                return n
+
+        self.reject_order(orderid)
+        return 0
+
+    def insert_orders(self, generation: int, items: list[tuple[int, float, int, str]], reqid: int) -> int:
+        """调用底层批量下单，并输出发送失败的委托，模板已重建时拒绝整批委托"""
+        with self.template_lock:
+            stale: bool = generation != self.template_generation
+            if not stale:
+                results: list[int] = self.reqOrderInsertBatch(items, reqid)
+
+        if stale:
+            for item in items:
+                self.reject_order(item[3])
+            return 0
+
+        for item, n in zip(items, results, strict=True):
+            if n:
+                self.gateway.write_log(f"委托{item[3]}发送失败，错误码：{n}")
+
+        return 0
+
+    def reject_order(self, orderid: str) -> None:
+        """拒绝使用旧委托模板排队的委托"""
+        self.latency_tracker.on_reject(orderid)
+        self.gateway.write_log(f"委托{orderid}排队期间委托模板已重建，已拒绝")
+
+        order: OrderData | None = self.orders.get(orderid, None)
+        if not order:
+            return
+
+        order = copy(order)
+        order.status = Status.REJECTED
+        self.orders[orderid] = order
+        self.gateway.on_order(order)
+
+        if self.callbacks["order"]:
+            self.run_callbacks("order", order)
+
+    def get_order_template(self, req: OrderRequest) -> int:
+        """获取委托请求对应的底层委托模板编号，不存在时创建，需在持有template_lock时调用"""
+        key: tuple = (req.symbol, req.exchange, req.direction, req.offset, req.type)
+
+        template_id: int | None = self.order_templates.get(key, None)
+        if template_id is None:
+            template_id = self.createOrderTemplate(self.generate_order_request(req))
+            self.order_templates[key] = template_id
+
+        return template_id
+
+    def generate_order_request(self, req: OrderRequest) -> dict:
+        """生成不含价格、数量和委托号的委托请求"""
         femas_req: dict = {
             "InstrumentID": req.symbol,
-            "ExchangeID": str(req.exchange).split(".")[1],
+            "ExchangeID": req.exchange.value,
             "BrokerID": self.brokerid,
             "InvestorID": self.investorid,
             "UserID": self.userid,
-            "LimitPrice": req.price,
-            "Volume": int(req.volume),
             "OrderPriceType": ORDERTYPE_VT2FEMAS.get(req.type, ""),
             "Direction": DIRECTION_VT2FEMAS.get(req.direction, ""),
             "OffsetFlag": OFFSET_VT2FEMAS.get(req.offset, ""),
-            "UserOrderLocalID": orderid,
             "HedgeFlag": USTP_FTDC_CHF_Speculation,
             "ForceCloseReason": USTP_FTDC_FCR_NotForceClose,
             "IsAutoSuspend": 0,
@@ -707,23 +1803,47 @@ class FemasTdApi(TdApi):
             femas_req["TimeCondition"] = USTP_FTDC_TC_IOC
             femas_req["VolumeCondition"] = USTP_FTDC_VC_CV
 
+        return femas_req
+
+    def cancel_order(self, req: CancelRequest) -> None:
+        """委托撤单"""
+        femas_req: dict = self.generate_cancel_request(req)
+        self.latency_tracker.on_cancel_send(req.orderid)
+
         self.reqid += 1
-        self.reqOrderInsert(femas_req, self.reqid)
+        self.trade_scheduler.submit(self.reqOrderAction, (femas_req, self.reqid))
 
-        order: OrderData = req.create_order_data(orderid, self.gateway_name)
-        self.gateway.on_order(order)
+    def cancel_orders(self, reqs: list[CancelRequest]) -> None:
+        """批量委托撤单，整批请求一次性交给底层发送"""
+        if not reqs:
+            return
 
-        vt_orderid: str = order.vt_orderid
-        return vt_orderid
+        femas_reqs: list[dict] = [self.generate_cancel_request(req) for req in reqs]
+        for req in reqs:
+            self.latency_tracker.on_cancel_send(req.orderid)
 
-    def cancel_order(self, req: CancelRequest) -> None:
-        """委托撤单"""
+        reqid: int = self.reqid + 1
+        self.reqid += len(femas_reqs)
+        self.trade_scheduler.submit(self.action_orders, (femas_reqs, reqid))
+
+    def action_orders(self, femas_reqs: list[dict], reqid: int) -> int:
+        """调用底层批量撤单，并输出发送失败的撤单"""
+        results: list[int] = self.reqOrderActionBatch(femas_reqs, reqid)
+
+        for femas_req, n in zip(femas_reqs, results, strict=True):
+            if n:
+                self.gateway.write_log(f"撤单{femas_req['UserOrderLocalID']}发送失败，错误码：{n}")
+
+        return 0
+
+    def generate_cancel_request(self, req: CancelRequest) -> dict:
+        """生成撤单请求"""
         self.localid += 1
         orderid: str = str(self.localid).rjust(12, "0")
 
         femas_req: dict = {
             "InstrumentID": req.symbol,
-            "ExchangeID": str(req.exchange).split(".")[1],
+            "ExchangeID": req.exchange.value,
             "UserOrderLocalID": req.orderid,
             "UserOrderActionLocalID": orderid,
             "ActionFlag": USTP_FTDC_AF_Delete,
@@ -731,14 +1851,12 @@ class FemasTdApi(TdApi):
             "InvestorID": self.investorid,
             "UserID": self.userid,
         }
+        return femas_req
 
-        self.reqid += 1
-        self.reqOrderAction(femas_req, self.reqid)
-
-    def query_account(self) -> None:
-        """查询资金"""
+    def query_account(self) -> bool:
+        """查询资金，尚未获取投资者代码时不发出请求并返回False"""
         if not self.investorid:
-            return
+            return False
 
         req: dict = {
             "BrokerID": self.brokerid,
@@ -747,12 +1865,13 @@ class FemasTdApi(TdApi):
         }
         self.reqid += 1
 
-        self.reqQryInvestorAccount(req, self.reqid)
+        self.query_scheduler.submit(self.reqQryInvestorAccount, (req, self.reqid), PRIORITY_POLL, "account")
+        return True
 
-    def query_position(self) -> None:
-        """查询持仓"""
+    def query_position(self) -> bool:
+        """查询持仓，尚未获取合约信息时不发出请求并返回False"""
         if not symbol_contract_map:
-            return
+            return False
 
         req: dict = {
             "BrokerID": self.brokerid,
@@ -761,9 +1880,42 @@ class FemasTdApi(TdApi):
         }
 
         self.reqid += 1
-        self.reqQryInvestorPosition(req, self.reqid)
+        self.query_trade_count = self.trade_count
+        self.query_scheduler.submit(self.reqQryInvestorPosition, (req, self.reqid), PRIORITY_POLL, "position")
+        return True
+
+    def get_queue_stats(self) -> dict:
+        """查询回调队列统计数据"""
+        stats: dict = self.getQueueStats()
+        return stats
+
+    def get_suppressed_counts(self) -> dict[str, int]:
+        """查询因数据没有变化而未推送的委托、持仓和资金次数"""
+        return {
+            "order": self.order_suppressed,
+            "position": self.position_suppressed,
+            "account": self.account_suppressed,
+        }
+
+    def get_order(self, orderid: str) -> OrderData | None:
+        """查询缓存的最新委托状态"""
+        return self.orders.get(orderid, None)
+
+    def get_scheduler_stats(self) -> dict[str, dict]:
+        """查询请求调度统计数据"""
+        return {
+            "query": self.query_scheduler.get_stats(),
+            "trade": self.trade_scheduler.get_stats(),
+        }
+
+    def on_request_error(self, name: str, n: int) -> None:
+        """请求发送失败"""
+        self.gateway.write_log(f"请求{name}发送失败，错误码：{n}")
 
     def close(self) -> None:
         """关闭连接"""
+        self.query_scheduler.stop()
+        self.trade_scheduler.stop()
+
         if self.connect_status:
             self.exit()
@@ -0,0 +1,199 @@
+"""
+飞马接口行情和委托延时统计。
+
+行情每个处理阶段的延时以纳秒为单位记录到按2的幂次分桶的直方图中，记录开销只有一次整数运算和列表更新，
+可以在生产环境中长期开启。底层接口统计的阶段（入队等待、数据转换）使用相同的分桶规则。
+
+委托往返延时按交易所和合约分别保存最近若干笔样本，用于计算滚动分位数，比较不同前置和柜台的响应速度。
+"""
+
+from collections import deque
+from math import ceil
+from threading import Lock
+from time import perf_counter_ns
+
+
+BUCKET_COUNT: int = 64
+
+# 委托往返延时阶段
+STAGE_ACK: str = "ack"          # 发出委托到首次收到委托回报
+STAGE_FILL: str = "fill"        # 发出委托到首次收到成交回报
+STAGE_CANCEL: str = "cancel"    # 发出撤单到收到撤单确认
+
+
+class LatencyHistogram:
+    """纳秒延时直方图，第n个桶统计二进制位数为n的延时，即[2^(n-1), 2^n)"""
+
+    def __init__(self) -> None:
+        """构造函数"""
+        self.buckets: list[int] = [0] * BUCKET_COUNT
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+
+    def record(self, ns: int) -> None:
+        """记录一次延时"""
+        if ns < 0:
+            ns = 0
+
+        self.buckets[ns.bit_length()] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def reset(self) -> None:
+        """清空统计数据"""
+        self.buckets = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def get_stats(self) -> dict:
+        """查询统计结果"""
+        return summarize_histogram(self.buckets, self.count, self.total, self.max)
+
+
+def summarize_histogram(buckets: list[int], count: int, total: int, max_ns: int) -> dict:
+    """根据直方图数据计算均值和分位数，分位数取所在桶的上界"""
+    return {
+        "count": count,
+        "mean_ns": total / count if count else 0,
+        "p50_ns": get_percentile(buckets, count, max_ns, 0.5),
+        "p90_ns": get_percentile(buckets, count, max_ns, 0.9),
+        "p99_ns": get_percentile(buckets, count, max_ns, 0.99),
+        "max_ns": max_ns,
+        "buckets": list(buckets),
+    }
+
+
+def get_percentile(buckets: list[int], count: int, max_ns: int, percent: float) -> int:
+    """计算分位数"""
+    if not count:
+        return 0
+
+    target: float = count * percent
+    accumulated: int = 0
+
+    for n, bucket_count in enumerate(buckets):
+        accumulated += bucket_count
+        if accumulated >= target:
+            return min((1 << n) - 1, max_ns)
+
+    return max_ns
+
+
+class OrderTiming:
+    """单笔委托的发送时间和已记录的阶段"""
+
+    def __init__(self, start: int, symbol: str, exchange: str) -> None:
+        """构造函数"""
+        self.start: int = start
+        self.symbol: str = symbol
+        self.exchange: str = exchange
+
+        self.acked: bool = False
+        self.filled: bool = False
+        self.cancel_start: int = 0
+
+
+class OrderLatencyTracker:
+    """委托往返延时统计，按阶段、交易所和合约保存最近window笔样本"""
+
+    def __init__(self, window: int = 1000, capacity: int = 100_000) -> None:
+        """构造函数，capacity为同时跟踪的最大委托数量，超出后丢弃最早的委托"""
+        self.window: int = window
+        self.capacity: int = capacity
+
+        # 委托发送在调用线程中执行，回报在底层回调线程中处理
+        self.lock: Lock = Lock()
+        self.timings: dict[str, OrderTiming] = {}
+        self.samples: dict[tuple[str, str, str], deque[int]] = {}
+
+    def on_send(self, orderid: str, symbol: str, exchange: str) -> None:
+        """发出委托"""
+        timing: OrderTiming = OrderTiming(perf_counter_ns(), symbol, exchange)
+
+        with self.lock:
+            self.timings[orderid] = timing
+
+            if len(self.timings) > self.capacity:
+                del self.timings[next(iter(self.timings))]
+
+    def on_ack(self, orderid: str) -> None:
+        """收到委托回报"""
+        timing: OrderTiming | None = self.timings.get(orderid, None)
+        if not timing or timing.acked:
+            return
+
+        timing.acked = True
+        self.record(STAGE_ACK, timing, perf_counter_ns() - timing.start)
+
+    def on_fill(self, orderid: str) -> None:
+        """收到成交回报"""
+        timing: OrderTiming | None = self.timings.get(orderid, None)
+        if not timing or timing.filled:
+            return
+
+        timing.filled = True
+        self.record(STAGE_FILL, timing, perf_counter_ns() - timing.start)
+
+    def on_reject(self, orderid: str) -> None:
+        """委托被拒绝，不再跟踪"""
+        with self.lock:
+            self.timings.pop(orderid, None)
+
+    def on_cancel_send(self, orderid: str) -> None:
+        """发出撤单"""
+        timing: OrderTiming | None = self.timings.get(orderid, None)
+        if timing and not timing.cancel_start:
+            timing.cancel_start = perf_counter_ns()
+
+    def on_cancel_fail(self, orderid: str) -> None:
+        """撤单失败，等待下一次撤单"""
+        timing: OrderTiming | None = self.timings.get(orderid, None)
+        if timing:
+            timing.cancel_start = 0
+
+    def on_cancel(self, orderid: str) -> None:
+        """收到撤单确认，委托已结束，不再跟踪"""
+        with self.lock:
+            timing: OrderTiming | None = self.timings.pop(orderid, None)
+
+        if timing and timing.cancel_start:
+            self.record(STAGE_CANCEL, timing, perf_counter_ns() - timing.cancel_start)
+
+    def record(self, stage: str, timing: OrderTiming, ns: int) -> None:
+        """按交易所和合约分别记录延时样本"""
+        for key in ((stage, "exchange", timing.exchange), (stage, "symbol", timing.symbol)):
+            samples: deque[int] | None = self.samples.get(key, None)
+            if samples is None:
+                samples = deque(maxlen=self.window)
+                self.samples[key] = samples
+            samples.append(ns)
+
+    def get_stats(self) -> dict[str, dict[str, dict[str, dict]]]:
+        """查询滚动延时统计，返回结构为{阶段: {"exchange"/"symbol": {名称: 统计结果}}}"""
+        stats: dict[str, dict[str, dict[str, dict]]] = {}
+
+        for (stage, kind, name), samples in list(self.samples.items()):
+            stats.setdefault(stage, {}).setdefault(kind, {})[name] = summarize_samples(list(samples))
+
+        return stats
+
+    def reset(self) -> None:
+        """清空延时样本"""
+        self.samples.clear()
+
+
+def summarize_samples(samples: list[int]) -> dict:
+    """根据延时样本计算分位数"""
+    samples.sort()
+    count: int = len(samples)
+
+    return {
+        "count": count,
+        "p50_ns": samples[max(ceil(count * 0.5) - 1, 0)] if count else 0,
+        "p99_ns": samples[max(ceil(count * 0.99) - 1, 0)] if count else 0,
+        "max_ns": samples[-1] if count else 0,
+    }
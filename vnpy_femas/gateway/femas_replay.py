@@ -0,0 +1,190 @@
+"""
+飞马接口底层回调数据的录制和回放工具。
+
+录制器拦截FemasMdApi和FemasTdApi上的回调函数，将原始回调数据连同到达时间
+由后台线程写入gzip压缩的二进制文件；回放器读取录制文件，按原始间隔、任意倍速
+或不等待的方式，将数据重新推送给同名回调函数，用于离线复现生产环境中的行情和回报。
+没有底层接口库的环境中离线回放时，需设置环境变量VNPY_FEMAS_STUB=1使用纯Python替身。
+"""
+
+import gzip
+import pickle
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from queue import SimpleQueue
+from threading import Thread
+from time import perf_counter_ns, sleep, time_ns
+from typing import TYPE_CHECKING
+
+from ..api import MdApi, TdApi
+
+if TYPE_CHECKING:
+    from .femas_gateway import FemasGateway
+
+
+FILE_MAGIC: bytes = b"FEMASREC"
+FILE_VERSION: int = 1
+
+# 精简和批量行情最终都会转入onRtnDepthMarketData，因此不重复录制
+SKIPPED_CALLBACKS: set[str] = {
+    "onRtnDepthMarketDataCompact",
+    "onRtnDepthMarketDataBatch",
+}
+
+# 深度行情字段，用于将精简行情对象转换为字典
+DEPTH_MARKET_DATA_FIELDS: tuple[str, ...] = (
+    "TradingDay", "SettlementGroupID", "SettlementID", "PreSettlementPrice",
+    "PreClosePrice", "PreOpenInterest", "PreDelta", "OpenPrice", "HighestPrice",
+    "LowestPrice", "ClosePrice", "UpperLimitPrice", "LowerLimitPrice",
+    "SettlementPrice", "CurrDelta", "LastPrice", "Volume", "Turnover",
+    "OpenInterest", "BidPrice1", "BidVolume1", "AskPrice1", "AskVolume1",
+    "BidPrice2", "BidVolume2", "BidPrice3", "BidVolume3", "AskPrice2",
+    "AskVolume2", "AskPrice3", "AskVolume3", "BidPrice4", "BidVolume4",
+    "BidPrice5", "BidVolume5", "AskPrice4", "AskVolume4", "AskPrice5",
+    "AskVolume5", "InstrumentID", "UpdateTime", "UpdateMillisec", "ActionDay",
+    "HisHighestPrice", "HisLowestPrice", "LatestVolume", "InitVolume",
+    "ChangeVolume", "BidImplyVolume", "AskImplyVolume", "AvgPrice", "ArbiType",
+    "InstrumentID_1", "InstrumentID_2", "InstrumentName", "TotalBidVolume",
+    "TotalAskVolume",
+)
+
+
+class CallbackRecorder:
+    """底层回调数据录制器"""
+
+    def __init__(self, path: str | Path) -> None:
+        """构造函数"""
+        self.path: Path = Path(path)
+
+        self.queue: SimpleQueue = SimpleQueue()
+        self.thread: Thread | None = None
+
+        self.start_time: int = 0
+        self.count: int = 0
+
+        self.hooked: list[tuple[object, str]] = []
+
+    def start(self, apis: dict[str, MdApi | TdApi]) -> None:
+        """拦截接口回调函数并启动后台写入线程，apis的键为数据来源名称"""
+        if self.thread:
+            return
+
+        file: gzip.GzipFile = gzip.open(self.path, "wb", compresslevel=1)
+        file.write(FILE_MAGIC)
+        file.write(pickle.dumps((FILE_VERSION, time_ns()), pickle.HIGHEST_PROTOCOL))
+
+        self.start_time = perf_counter_ns()
+        self.thread = Thread(target=self.run, args=(file,), daemon=True)
+        self.thread.start()
+
+        for source, api in apis.items():
+            for name in get_callback_names(api):
+                func: Callable = getattr(api, name)
+                setattr(api, name, self.wrap(source, name, func))
+                self.hooked.append((api, name))
+
+    def stop(self) -> None:
+        """恢复接口回调函数，并等待剩余数据写入完成"""
+        if not self.thread:
+            return
+
+        for api, name in self.hooked:
+            delattr(api, name)
+        self.hooked.clear()
+
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def wrap(self, source: str, name: str, func: Callable) -> Callable:
+        """生成录制数据后再调用原回调函数的包装函数"""
+        record: Callable = self.record
+
+        def wrapper(*args: object) -> object:
+            record(source, name, args)
+            return func(*args)
+
+        return wrapper
+
+    def record(self, source: str, name: str, args: tuple) -> None:
+        """记录一次回调"""
+        if name == "onRtnDepthMarketData" and not isinstance(args[0], dict):
+            data: object = args[0]
+            args = ({k: data[k] for k in DEPTH_MARKET_DATA_FIELDS},)       # type: ignore
+
+        self.queue.put((perf_counter_ns() - self.start_time, source, name, args))
+        self.count += 1
+
+    def run(self, file: gzip.GzipFile) -> None:
+        """后台写入线程"""
+        with file:
+            while True:
+                record: tuple | None = self.queue.get()
+                if record is None:
+                    break
+                file.write(pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+
+
+class CallbackReplayer:
+    """底层回调数据回放器"""
+
+    def __init__(self, gateway: "FemasGateway") -> None:
+        """构造函数"""
+        self.apis: dict[str, MdApi | TdApi] = {
+            "md": gateway.md_api,
+            "td": gateway.td_api,
+        }
+
+    def replay(self, path: str | Path, speed: float = 1.0) -> int:
+        """
+        回放录制文件，返回回放的回调数量。
+
+        speed为回放倍速：1为按录制时的间隔回放，N为N倍速，0为不等待尽快回放。
+        """
+        count: int = 0
+        start: int = perf_counter_ns()
+        first: int | None = None
+
+        for timestamp, source, name, args in load_records(path):
+            if speed:
+                if first is None:
+                    first = timestamp
+
+                target: float = start + (timestamp - first) / speed
+                delay: float = (target - perf_counter_ns()) / 1e9
+                if delay > 0:
+                    sleep(delay)
+
+            getattr(self.apis[source], name)(*args)
+            count += 1
+
+        return count
+
+
+def get_callback_names(api: MdApi | TdApi) -> list[str]:
+    """获取接口对象在Python中实现的回调函数名称"""
+    names: list[str] = []
+
+    for cls in type(api).__mro__:
+        if cls in (MdApi, TdApi, object):
+            break
+
+        for name in vars(cls):
+            if name.startswith("on") and name not in SKIPPED_CALLBACKS and name not in names:
+                names.append(name)
+
+    return names
+
+
+def load_records(path: str | Path) -> Iterator[tuple[int, str, str, tuple]]:
+    """读取录制文件，逐条返回（相对时间戳纳秒，数据来源，回调函数名，参数）"""
+    with gzip.open(path, "rb") as f:
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"不是有效的飞马回调录制文件：{path}")
+        pickle.load(f)
+
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                break
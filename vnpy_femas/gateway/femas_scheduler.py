@@ -0,0 +1,202 @@
+"""
+飞马接口的请求流量控制调度器。
+
+采用令牌桶算法限制请求发送速率：令牌充足且没有排队请求时直接在调用线程中发送，
+否则按优先级放入队列，由后台线程在令牌恢复后依次发送，调用方和底层回调线程都不会被阻塞。
+
+触发柜台流控的请求重新排队，并按指数退避暂停发送，退避与令牌桶速率无关，不限速时同样生效，
+超过最大重试次数后放弃该请求并通过on_error通知。
+"""
+
+from collections.abc import Callable
+from heapq import heappop, heappush
+from itertools import count
+from threading import Condition, Thread
+from time import monotonic
+
+
+# 请求优先级，数值越小越先发送
+PRIORITY_TRADE: int = 0     # 登录认证、委托撤单
+PRIORITY_SETUP: int = 1     # 登录后的初始化查询
+PRIORITY_POLL: int = 2      # 定时轮询查询
+
+# 底层返回这些错误码时说明触发了柜台流控，请求会重新排队
+THROTTLED_CODES: set[int] = {-2, -3}
+
+# 触发流控后的重试等待时间（秒），每次重试翻倍，不超过上限
+RETRY_DELAY: float = 0.05
+MAX_RETRY_DELAY: float = 1.0
+MAX_RETRIES: int = 8
+
+
+class RequestScheduler:
+    """令牌桶请求调度器"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        on_error: Callable[[str, int], None] | None = None
+    ) -> None:
+        """构造函数，rate为每秒发送请求数（0为不限速），burst为令牌桶容量"""
+        self.rate: float = rate
+        self.burst: int = burst
+        self.on_error: Callable[[str, int], None] | None = on_error
+
+        self.tokens: float = burst
+        self.last: float = monotonic()
+
+        # 触发流控后在该时刻之前暂停发送
+        self.resume_time: float = 0
+
+        self.queue: list[tuple[int, int, str, Callable, tuple, int]] = []
+        self.keys: set[str] = set()
+        self.counter: count = count()
+
+        self.condition: Condition = Condition()
+        self.active: bool = False
+        self.thread: Thread | None = None
+
+        self.sent_count: int = 0
+        self.deferred_count: int = 0
+        self.throttled_count: int = 0
+        self.dropped_count: int = 0
+
+    def start(self) -> None:
+        """启动后台发送线程"""
+        if self.active:
+            return
+
+        self.active = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """停止后台发送线程，并丢弃尚未发送的请求"""
+        if not self.active:
+            return
+
+        with self.condition:
+            self.active = False
+            self.queue.clear()
+            self.keys.clear()
+            self.condition.notify()
+
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def submit(
+        self,
+        func: Callable[..., int],
+        args: tuple,
+        priority: int = PRIORITY_TRADE,
+        key: str = ""
+    ) -> bool:
+        """
+        提交请求，立即发送时返回True，排队等待时返回False。
+
+        key非空时，相同key的请求在队列中最多只保留一个，用于避免轮询查询堆积。
+        """
+        seq: int = next(self.counter)
+
+        with self.condition:
+            if self.queue or monotonic() < self.resume_time or not self.acquire():
+                self.push(priority, seq, key, func, args, 0)
+                return False
+
+        self.send(priority, seq, key, func, args, 0)
+        return True
+
+    def push(self, priority: int, seq: int, key: str, func: Callable, args: tuple, retries: int) -> None:
+        """请求放入队列，需在持有锁时调用"""
+        if key:
+            if key in self.keys:
+                return
+            self.keys.add(key)
+
+        heappush(self.queue, (priority, seq, key, func, args, retries))
+        self.deferred_count += 1
+        self.condition.notify()
+
+    def send(
+        self,
+        priority: int,
+        seq: int,
+        key: str,
+        func: Callable[..., int],
+        args: tuple,
+        retries: int
+    ) -> None:
+        """调用底层函数发送请求，触发流控时清空令牌，暂停发送一段时间后重试"""
+        n: int = func(*args)
+
+        if n in THROTTLED_CODES:
+            with self.condition:
+                self.tokens = 0
+                self.throttled_count += 1
+
+                if retries < MAX_RETRIES:
+                    delay: float = min(RETRY_DELAY * 2 ** retries, MAX_RETRY_DELAY)
+                    self.resume_time = max(self.resume_time, monotonic() + delay)
+                    self.push(priority, seq, key, func, args, retries + 1)
+                    return
+
+                self.dropped_count += 1
+
+            if self.on_error:
+                self.on_error(getattr(func, "__name__", ""), n)
+        elif n:
+            if self.on_error:
+                self.on_error(getattr(func, "__name__", ""), n)
+        else:
+            self.sent_count += 1
+
+    def acquire(self) -> bool:
+        """尝试获取令牌，需在持有锁时调用"""
+        if self.rate <= 0:
+            return True
+
+        now: float = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+    def run(self) -> None:
+        """后台发送线程"""
+        while True:
+            with self.condition:
+                while self.active and not self.queue:
+                    self.condition.wait()
+
+                if not self.active:
+                    return
+
+                delay: float = self.resume_time - monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+
+                if not self.acquire():
+                    self.condition.wait((1 - self.tokens) / self.rate)
+                    continue
+
+                priority, seq, key, func, args, retries = heappop(self.queue)
+                self.keys.discard(key)
+
+            self.send(priority, seq, key, func, args, retries)
+
+    def get_stats(self) -> dict:
+        """查询调度统计数据"""
+        return {
+            "pending": len(self.queue),
+            "sent": self.sent_count,
+            "deferred": self.deferred_count,
+            "throttled": self.throttled_count,
+            "dropped": self.dropped_count,
+        }
@@ -0,0 +1,246 @@
+"""
+飞马接口最新行情共享内存表。
+
+行情接口将每笔行情写入内存映射文件中按合约分配的固定槽位，同一台机器上的其他进程
+（风控监控、看板等）可以直接读取各合约的最新行情，无需建立自己的柜台连接或通过RPC转发。
+
+每个槽位以序列号实现顺序锁：写入前序列号加1变为奇数，写完后再加1变为偶数。读取方在读取前后
+各读一次序列号，两次相同且为偶数时说明读到的是完整一致的快照，否则重试。写入方只有一个，
+读取方不会阻塞写入方，也不需要获取行情进程的GIL。
+"""
+
+import mmap
+import struct
+from datetime import datetime
+from pathlib import Path
+from time import time_ns
+
+from vnpy.trader.object import TickData
+from vnpy.trader.utility import ZoneInfo
+
+
+TABLE_MAGIC: bytes = b"FEMASTCK"
+TABLE_VERSION: int = 1
+
+# 表头：标识，版本，槽位数量，槽位大小，已用槽位数量，写入方启动时间
+HEADER_STRUCT: struct.Struct = struct.Struct("<8sIIIIq")
+HEADER_SIZE: int = 64
+
+SEQUENCE_STRUCT: struct.Struct = struct.Struct("<Q")
+COUNT_OFFSET: int = 20
+START_TIME_STRUCT: struct.Struct = struct.Struct("<q")
+START_TIME_OFFSET: int = 24
+
+# 槽位内容，位于序列号之后：合约代码，交易所，行情时间戳（纳秒）和各价格数量字段
+TICK_FIELDS: tuple[str, ...] = (
+    "last_price", "volume", "limit_up", "limit_down",
+    "open_price", "high_price", "low_price", "pre_close",
+    "bid_price_1", "ask_price_1", "bid_volume_1", "ask_volume_1",
+)
+SLOT_STRUCT: struct.Struct = struct.Struct("<32s8sq" + "d" * len(TICK_FIELDS))
+SLOT_SIZE: int = (SEQUENCE_STRUCT.size + SLOT_STRUCT.size + 63) // 64 * 64
+
+READ_RETRY: int = 100
+
+CHINA_TZ = ZoneInfo("Asia/Shanghai")
+
+
+class TickSnapshotWriter:
+    """最新行情表写入方"""
+
+    def __init__(self, path: str | Path, capacity: int = 4096) -> None:
+        """构造函数，capacity为最多可容纳的合约数量"""
+        self.path: Path = Path(path)
+        self.capacity: int = capacity
+
+        size: int = HEADER_SIZE + SLOT_SIZE * capacity
+
+        # 文件已存在时原地复用，避免正在读取的进程因文件被截断而出错
+        mode: str = "r+b" if self.path.exists() else "w+b"
+        with open(self.path, mode) as f:
+            if f.seek(0, 2) < size:
+                f.truncate(size)
+            self.buffer: mmap.mmap = mmap.mmap(f.fileno(), size)
+
+        self.buffer[:size] = bytes(size)
+        HEADER_STRUCT.pack_into(
+            self.buffer, 0, TABLE_MAGIC, TABLE_VERSION, capacity, SLOT_SIZE, 0, time_ns()
+        )
+
+        self.slots: dict[str, int] = {}
+        self.sequences: list[int] = [0] * capacity
+
+    def write(self, tick: TickData) -> None:
+        """写入一笔行情，槽位已满时忽略新合约"""
+        index: int | None = self.slots.get(tick.symbol, None)
+        if index is None:
+            index = self.add_slot(tick)
+            if index is None:
+                return
+
+        offset: int = HEADER_SIZE + SLOT_SIZE * index
+        sequence: int = self.sequences[index] + 2
+        self.sequences[index] = sequence
+
+        buffer: mmap.mmap = self.buffer
+        SEQUENCE_STRUCT.pack_into(buffer, offset, sequence - 1)
+        SLOT_STRUCT.pack_into(
+            buffer,
+            offset + SEQUENCE_STRUCT.size,
+            tick.symbol.encode(),
+            tick.exchange.value.encode(),
+            int(tick.datetime.timestamp() * 1_000_000_000),
+            tick.last_price,
+            tick.volume,
+            tick.limit_up,
+            tick.limit_down,
+            tick.open_price,
+            tick.high_price,
+            tick.low_price,
+            tick.pre_close,
+            tick.bid_price_1,
+            tick.ask_price_1,
+            tick.bid_volume_1,
+            tick.ask_volume_1,
+        )
+        SEQUENCE_STRUCT.pack_into(buffer, offset, sequence)
+
+    def add_slot(self, tick: TickData) -> int | None:
+        """为新合约分配槽位，写入合约代码后再更新已用槽位数量"""
+        index: int = len(self.slots)
+        if index >= self.capacity:
+            return None
+
+        self.slots[tick.symbol] = index
+        self.init_slot(index, tick)
+        return index
+
+    def init_slot(self, index: int, tick: TickData) -> None:
+        """以空数据写入槽位，使读取方扫描时能看到合约代码"""
+        offset: int = HEADER_SIZE + SLOT_SIZE * index
+        SLOT_STRUCT.pack_into(
+            self.buffer,
+            offset + SEQUENCE_STRUCT.size,
+            tick.symbol.encode(),
+            tick.exchange.value.encode(),
+            0,
+            *([0.0] * len(TICK_FIELDS)),
+        )
+        struct.pack_into("<I", self.buffer, COUNT_OFFSET, index + 1)
+
+    def close(self) -> None:
+        """关闭内存映射"""
+        self.buffer.close()
+
+
+class TickSnapshotReader:
+    """最新行情表读取方，可在任意本地进程中使用"""
+
+    def __init__(self, path: str | Path) -> None:
+        """构造函数"""
+        self.path: Path = Path(path)
+        self.capacity: int = 0
+        self.start_time: int = 0
+        self.slots: dict[str, int] = {}
+
+        self.buffer: mmap.mmap = self.map_file()
+
+    def map_file(self) -> mmap.mmap:
+        """映射表文件并读取槽位数量，写入方以不同容量重启后需重新映射"""
+        with open(self.path, "rb") as f:
+            buffer: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, capacity, slot_size, _, _ = HEADER_STRUCT.unpack_from(buffer, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or slot_size != SLOT_SIZE:
+            buffer.close()
+            raise ValueError(f"不是有效的飞马最新行情表：{self.path}")
+
+        self.capacity = min(capacity, (len(buffer) - HEADER_SIZE) // SLOT_SIZE)
+        return buffer
+
+    def refresh(self) -> None:
+        """扫描新增的合约槽位，写入方重启后重新建立索引"""
+        magic, _, capacity, _, count, start_time = HEADER_STRUCT.unpack_from(self.buffer, 0)
+
+        if start_time != self.start_time:
+            self.start_time = start_time
+            self.slots.clear()
+
+            # 写入方初始化表头期间不重新映射，下次刷新时再检查
+            if magic == TABLE_MAGIC and capacity != self.capacity:
+                old: mmap.mmap = self.buffer
+                self.buffer = self.map_file()
+                old.close()
+
+        for index in range(len(self.slots), min(count, self.capacity)):
+            offset: int = HEADER_SIZE + SLOT_SIZE * index + SEQUENCE_STRUCT.size
+            symbol: bytes = SLOT_STRUCT.unpack_from(self.buffer, offset)[0]
+            self.slots[symbol.rstrip(b"\x00").decode()] = index
+
+    def get(self, symbol: str) -> dict | None:
+        """读取合约的最新行情快照，合约不存在或尚无行情时返回None"""
+        # 写入方重启后槽位会重新分配，缓存的索引可能指向其他合约
+        start_time: int = START_TIME_STRUCT.unpack_from(self.buffer, START_TIME_OFFSET)[0]
+
+        index: int | None = self.slots.get(symbol, None)
+        if index is None or start_time != self.start_time:
+            self.refresh()
+            index = self.slots.get(symbol, None)
+            if index is None:
+                return None
+
+        snapshot: dict | None = self.read_slot(index)
+        if snapshot and snapshot["symbol"] != symbol:
+            self.refresh()
+            index = self.slots.get(symbol, None)
+            if index is None:
+                return None
+
+            snapshot = self.read_slot(index)
+            if snapshot and snapshot["symbol"] != symbol:
+                return None
+
+        return snapshot
+
+    def get_all(self) -> dict[str, dict]:
+        """读取所有合约的最新行情快照"""
+        self.refresh()
+
+        snapshots: dict[str, dict] = {}
+        for symbol, index in self.slots.items():
+            snapshot: dict | None = self.read_slot(index)
+            if snapshot:
+                snapshots[symbol] = snapshot
+        return snapshots
+
+    def read_slot(self, index: int) -> dict | None:
+        """按顺序锁协议读取槽位，写入中或读取期间被改写时重试"""
+        offset: int = HEADER_SIZE + SLOT_SIZE * index
+        buffer: mmap.mmap = self.buffer
+
+        for _ in range(READ_RETRY):
+            before: int = SEQUENCE_STRUCT.unpack_from(buffer, offset)[0]
+            if before & 1:
+                continue
+
+            values: tuple = SLOT_STRUCT.unpack_from(buffer, offset + SEQUENCE_STRUCT.size)
+
+            after: int = SEQUENCE_STRUCT.unpack_from(buffer, offset)[0]
+            if before != after:
+                continue
+
+            if not before:
+                return None
+
+            snapshot: dict = dict(zip(TICK_FIELDS, values[3:], strict=True))
+            snapshot["symbol"] = values[0].rstrip(b"\x00").decode()
+            snapshot["exchange"] = values[1].rstrip(b"\x00").decode()
+            snapshot["datetime"] = datetime.fromtimestamp(values[2] / 1_000_000_000, CHINA_TZ)
+            snapshot["sequence"] = before // 2
+            return snapshot
+
+        return None
+
+    def close(self) -> None:
+        """关闭内存映射"""
+        self.buffer.close()
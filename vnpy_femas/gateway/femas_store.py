@@ -0,0 +1,329 @@
+"""
+飞马接口行情列式存储。
+
+行情回调中只把原始行情数据放入队列，由后台线程按交易日和合约分组后，写入预分配的内存映射列文件。
+每个字段对应一个NumPy标准的.npy文件，存放在“根目录/交易日/合约代码/”下，可以直接用numpy.load读取。
+
+写入过程中文件长度为预分配容量，容量不足时按倍数扩容，有效行数记录在同目录的count文件中，
+每隔flush_interval秒才写入磁盘并更新，load_ticks函数会按有效行数截取；交易日切换或停止存储时，
+文件会被写入磁盘并截断为实际长度。时间戳列使用行情发生的自然日，同一交易日内的夜盘和日盘数据按时间递增。
+
+待写入队列有长度上限，队列已满或写入出错后新到的行情直接丢弃并计数，写入错误通过on_error回调报告。
+"""
+
+import json
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Thread
+from time import monotonic
+
+import numpy as np
+
+
+# 列名，飞马行情字段名，数据类型
+TICK_COLUMNS: tuple[tuple[str, str, str], ...] = (
+    ("last_price", "LastPrice", "f8"),
+    ("volume", "Volume", "i8"),
+    ("turnover", "Turnover", "f8"),
+    ("open_interest", "OpenInterest", "f8"),
+    ("open_price", "OpenPrice", "f8"),
+    ("high_price", "HighestPrice", "f8"),
+    ("low_price", "LowestPrice", "f8"),
+    ("limit_up", "UpperLimitPrice", "f8"),
+    ("limit_down", "LowerLimitPrice", "f8"),
+    ("pre_close", "PreClosePrice", "f8"),
+    ("pre_settlement", "PreSettlementPrice", "f8"),
+    ("bid_price_1", "BidPrice1", "f8"),
+    ("bid_price_2", "BidPrice2", "f8"),
+    ("bid_price_3", "BidPrice3", "f8"),
+    ("bid_price_4", "BidPrice4", "f8"),
+    ("bid_price_5", "BidPrice5", "f8"),
+    ("ask_price_1", "AskPrice1", "f8"),
+    ("ask_price_2", "AskPrice2", "f8"),
+    ("ask_price_3", "AskPrice3", "f8"),
+    ("ask_price_4", "AskPrice4", "f8"),
+    ("ask_price_5", "AskPrice5", "f8"),
+    ("bid_volume_1", "BidVolume1", "i8"),
+    ("bid_volume_2", "BidVolume2", "i8"),
+    ("bid_volume_3", "BidVolume3", "i8"),
+    ("bid_volume_4", "BidVolume4", "i8"),
+    ("bid_volume_5", "BidVolume5", "i8"),
+    ("ask_volume_1", "AskVolume1", "i8"),
+    ("ask_volume_2", "AskVolume2", "i8"),
+    ("ask_volume_3", "AskVolume3", "i8"),
+    ("ask_volume_4", "AskVolume4", "i8"),
+    ("ask_volume_5", "AskVolume5", "i8"),
+)
+
+# 行情时间戳列，单位为纳秒
+DATETIME_COLUMN: str = "datetime"
+
+COUNT_FILENAME: str = "count"
+
+
+class TickColumns:
+    """单个合约单个交易日的列文件"""
+
+    def __init__(self, path: Path, capacity: int) -> None:
+        """构造函数，目录中已有数据时继续追加"""
+        self.path: Path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.count: int = load_count(path)
+        self.capacity: int = 0
+        self.arrays: dict[str, np.memmap] = {}
+
+        self.reserve(max(capacity, self.count))
+
+    def reserve(self, capacity: int) -> None:
+        """调整预分配容量，已写入的数据先读入内存，关闭原映射后再写回新文件"""
+        for name, dtype in get_column_types():
+            file_path: Path = self.path.joinpath(f"{name}.npy")
+
+            data: np.ndarray | None = None
+            if self.count:
+                old: np.ndarray | None = self.arrays.pop(name, None)
+                if old is None:
+                    old = np.load(file_path, mmap_mode="r")
+                data = np.array(old[:self.count])
+                del old
+
+            array: np.memmap = np.lib.format.open_memmap(
+                file_path, mode="w+", dtype=dtype, shape=(capacity,)
+            )
+            if data is not None:
+                array[:self.count] = data
+
+            array.flush()
+            self.arrays[name] = array
+
+        self.capacity = capacity
+
+    def append(self, columns: dict[str, list]) -> None:
+        """追加多行数据"""
+        n: int = len(columns[DATETIME_COLUMN])
+
+        if self.count + n > self.capacity:
+            self.reserve(max(self.capacity * 2, self.count + n))
+
+        for name, values in columns.items():
+            self.arrays[name][self.count:self.count + n] = values
+
+        self.count += n
+
+    def flush(self) -> None:
+        """将数据写入磁盘，再更新有效行数"""
+        for array in self.arrays.values():
+            array.flush()
+
+        save_count(self.path, self.count)
+
+    def close(self) -> None:
+        """写入磁盘并将文件截断为实际长度"""
+        self.flush()
+
+        if 0 < self.count < self.capacity:
+            self.reserve(self.count)
+
+        self.arrays.clear()
+
+
+class TickStore:
+    """行情列式存储"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        capacity: int = 1_000,
+        interval: float = 1.0,
+        on_error: Callable[[str], None] | None = None,
+        flush_interval: float = 10.0,
+        queue_size: int = 200_000
+    ) -> None:
+        """
+        构造函数，capacity为每个合约的初始预分配行数，interval为后台线程等待新数据的超时时间（秒），
+        flush_interval为写入磁盘并更新有效行数的间隔（秒），queue_size为待写入队列的长度上限。
+        """
+        self.path: Path = Path(path)
+        self.capacity: int = capacity
+        self.interval: float = interval
+        self.flush_interval: float = flush_interval
+        self.on_error: Callable[[str], None] | None = on_error
+
+        self.queue: Queue = Queue(queue_size)
+        self.thread: Thread | None = None
+        self.last_flush: float = 0
+
+        # 队列已满或写入出错后丢弃的行情数量
+        self.failed: bool = False
+        self.dropped_count: int = 0
+
+        self.columns: dict[str, TickColumns] = {}
+        self.trading_days: dict[str, str] = {}
+
+    def start(self) -> None:
+        """启动后台写入线程"""
+        if self.thread:
+            return
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """等待剩余数据写入完成，并截断所有列文件"""
+        if not self.thread:
+            return
+
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def append(self, symbol: str, trading_day: str, dt: datetime, data: dict) -> None:
+        """在行情回调中调用，只将数据放入队列"""
+        if self.failed:
+            self.dropped_count += 1
+            return
+
+        try:
+            self.queue.put_nowait((symbol, trading_day, dt, data))
+        except Full:
+            self.dropped_count += 1
+
+    def run(self) -> None:
+        """后台写入线程，批量处理队列中的数据，并定时写入磁盘"""
+        active: bool = True
+        self.last_flush = monotonic()
+
+        while active:
+            records: list = []
+
+            try:
+                record: tuple | None = self.queue.get(timeout=self.interval)
+                while record is not None:
+                    records.append(record)
+                    record = self.queue.get_nowait()
+                active = False
+            except Empty:
+                pass
+
+            if self.failed:
+                self.dropped_count += len(records)
+                continue
+
+            try:
+                if records:
+                    self.write(records)
+
+                if monotonic() - self.last_flush >= self.flush_interval:
+                    self.flush()
+            except Exception as e:
+                self.failed = True
+                self.dropped_count += len(records)
+                self.report_error(f"行情存储写入失败，后续行情将不再存储：{e!r}")
+
+        for columns in self.columns.values():
+            try:
+                columns.close()
+            except Exception as e:
+                self.report_error(f"行情存储文件关闭失败：{columns.path}，{e!r}")
+        self.columns.clear()
+
+    def flush(self) -> None:
+        """将所有合约的数据写入磁盘并更新有效行数"""
+        for columns in self.columns.values():
+            columns.flush()
+
+        self.last_flush = monotonic()
+
+    def report_error(self, msg: str) -> None:
+        """报告写入线程中的错误"""
+        if self.on_error:
+            self.on_error(msg)
+
+    def write(self, records: list) -> None:
+        """按合约分组后转换为列数据写入"""
+        groups: dict[str, list] = {}
+        for record in records:
+            groups.setdefault(record[0], []).append(record)
+
+        for symbol, rows in groups.items():
+            trading_day: str = rows[0][1]
+            columns: TickColumns = self.get_columns(symbol, trading_day)
+
+            # 交易日切换时关闭前一日的文件（写入磁盘并截断），并将后续数据写入新的目录
+            start: int = 0
+            for i, row in enumerate(rows):
+                if row[1] != trading_day:
+                    columns.append(convert_rows(rows[start:i]))
+
+                    trading_day = row[1]
+                    columns = self.get_columns(symbol, trading_day)
+                    start = i
+
+            columns.append(convert_rows(rows[start:]))
+
+    def get_columns(self, symbol: str, trading_day: str) -> TickColumns:
+        """获取合约当前交易日的列文件"""
+        if self.trading_days.get(symbol, None) != trading_day:
+            old: TickColumns | None = self.columns.pop(symbol, None)
+            if old:
+                old.close()
+
+            self.columns[symbol] = TickColumns(self.path.joinpath(trading_day, symbol), self.capacity)
+            self.trading_days[symbol] = trading_day
+
+        return self.columns[symbol]
+
+
+def get_column_types() -> list[tuple[str, str]]:
+    """获取所有列的名称和数据类型"""
+    return [(DATETIME_COLUMN, "i8")] + [(name, dtype) for name, _, dtype in TICK_COLUMNS]
+
+
+def convert_rows(rows: list) -> dict[str, list]:
+    """将原始行情数据转换为按列组织的数据"""
+    columns: dict[str, list] = {
+        DATETIME_COLUMN: [int(row[2].timestamp() * 1_000_000_000) for row in rows]
+    }
+
+    for name, field, _ in TICK_COLUMNS:
+        columns[name] = [row[3][field] for row in rows]
+
+    return columns
+
+
+def load_count(path: Path) -> int:
+    """读取有效行数"""
+    count_path: Path = path.joinpath(COUNT_FILENAME)
+    if not count_path.exists():
+        return 0
+
+    with open(count_path) as f:
+        count: int = json.load(f)
+    return count
+
+
+def save_count(path: Path, count: int) -> None:
+    """保存有效行数，先写入临时文件再替换"""
+    count_path: Path = path.joinpath(COUNT_FILENAME)
+    temp_path: Path = count_path.with_suffix(".tmp")
+
+    with open(temp_path, "w") as f:
+        json.dump(count, f)
+
+    temp_path.replace(count_path)
+
+
+def load_ticks(path: str | Path, trading_day: str, symbol: str) -> dict[str, np.ndarray]:
+    """以内存映射方式读取合约某个交易日的行情列数据，只返回有效行"""
+    folder: Path = Path(path).joinpath(trading_day, symbol)
+    count: int = load_count(folder)
+
+    arrays: dict[str, np.ndarray] = {}
+    for name, _ in get_column_types():
+        array: np.ndarray = np.load(folder.joinpath(f"{name}.npy"), mmap_mode="r")
+        arrays[name] = array[:count]
+
+    return arrays